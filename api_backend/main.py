@@ -1,7 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Response
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
-from db.db_manager import save_event, get_all_events, init_db
-from notifications import send_sms_alert
+from db.db_manager import (
+    save_event, save_events, query_events, latest_event_id, init_db, get_writer, DEFAULT_PAGE_SIZE
+)
+from notifications import send_sms_alert_async, get_notifier
+from ml_backend.notification_dispatcher import NotificationDispatcher
+from ml_backend.zones import sms_rules
+import asyncio
 import time
 
 app = FastAPI()
@@ -12,59 +18,210 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 init_db()
 
-@app.get("/")
-def home():
-    return {"message": "Backend running"}
+# SMS thresholds come from the "sms" section of the zone rules file
+SMS_RULES = sms_rules()
+SMS_CONFIDENCE_THRESHOLD = float(SMS_RULES["min_confidence"])
+DANGEROUS_OBJECTS = list(SMS_RULES["video_labels"])
 
-@app.post("/audio_alert")
-def audio_alert(data: dict):
-    label = data["label"]
-    confidence = float(data["confidence"])
-    timestamp = data.get("timestamp", time.time())
+# Repeats of the same (source, label) within the cooldown are dropped;
+# only its suppression rules are used, delivery runs on the event loop
+sms_dispatcher = NotificationDispatcher()
 
-    sms_sent = 0
+# Upper bound on SMS sends in flight at once
+MAX_PENDING_SMS = 64
+_sms_slots = None
+_sms_tasks = set()
+
+# Largest batch accepted by /alerts/batch
+MAX_BATCH_ALERTS = 5000
+
+# The write-behind queue is full; clients retry 503s with backoff
+WRITER_FULL = "event queue full, retry later"
+INVALID_ALERT = "label and source must be strings, confidence and timestamp numbers"
 
-    if label != "normal" and confidence >= 0.85:
-        send_sms_alert("AUDIO", label, confidence)
-        sms_sent = 1
+def _should_send_sms(event_type, label, confidence):
+    if confidence < SMS_CONFIDENCE_THRESHOLD:
+        return False
+    if event_type == "audio":
+        return label != "normal"
+    if event_type == "video":
+        return label in DANGEROUS_OBJECTS
+    return False
 
-    save_event(
-        event_type="audio",
-        label=label,
-        confidence=confidence,
-        timestamp=timestamp,
-        sms_sent=sms_sent
+async def _deliver_sms(event_type, label, confidence):
+    async with _sms_slots:
+        await send_sms_alert_async(event_type, label, confidence)
+
+def _schedule_sms(event_type, label, confidence):
+    # Fire and forget; keep a reference so the task is not collected
+    task = asyncio.get_running_loop().create_task(_deliver_sms(event_type, label, confidence))
+    _sms_tasks.add(task)
+    task.add_done_callback(_sms_tasks.discard)
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _valid_alert(data):
+    """
+    label (and source, if given) must be strings, confidence (and
+    timestamp, if given) numbers, so a stored row can always be bound.
+    """
+
+    return (
+        isinstance(data, dict)
+        and isinstance(data.get("label"), str)
+        and _is_number(data.get("confidence"))
+        and (data.get("timestamp") is None or _is_number(data["timestamp"]))
+        and (data.get("source") is None or isinstance(data["source"], str))
     )
 
-    return {"status": "ok"}
+def _process_alert(event_type, data):
+    """
+    Applies the SMS rule to one alert and returns the event to store.
+    Must run on the event loop; the SMS itself is sent in the background.
+    """
 
-@app.post("/video_alert")
-def video_alert(data: dict):
     label = data["label"]
     confidence = float(data["confidence"])
     timestamp = data.get("timestamp", time.time())
 
     sms_sent = 0
-    dangerous_objects = ["knife", "gun", "scissors"]
-
-    if label in dangerous_objects and confidence >= 0.85:
-        send_sms_alert("VIDEO", label, confidence)
-        sms_sent = 1
-
-    save_event(
-        event_type="video",
-        label=label,
-        confidence=confidence,
-        timestamp=timestamp,
-        sms_sent=sms_sent
-    )
 
+    if _should_send_sms(event_type, label, confidence):
+        key = (data.get("source"), label)
+        if sms_dispatcher.should_send(key):
+            _schedule_sms(event_type.upper(), label, confidence)
+            sms_sent = 1
+
+    return {
+        "event_type": event_type,
+        "label": label,
+        "confidence": confidence,
+        "timestamp": timestamp,
+        "sms_sent": sms_sent,
+        "source": data.get("source")
+    }
+
+@app.on_event("startup")
+async def start_writer():
+    global _sms_slots
+    _sms_slots = asyncio.Semaphore(MAX_PENDING_SMS)
+    get_writer()
+
+@app.on_event("shutdown")
+async def stop_writer():
+    if _sms_tasks:
+        await asyncio.wait(_sms_tasks, timeout=5)
+    get_writer().stop()
+
+@app.get("/")
+def home():
+    return {"message": "Backend running"}
+
+@app.post("/audio_alert")
+async def audio_alert(data: dict):
+    if not _valid_alert(data):
+        raise HTTPException(status_code=422, detail=INVALID_ALERT)
+    if not save_event(**_process_alert("audio", data)):
+        raise HTTPException(status_code=503, detail=WRITER_FULL)
     return {"status": "ok"}
 
+@app.post("/video_alert")
+async def video_alert(data: dict):
+    if not _valid_alert(data):
+        raise HTTPException(status_code=422, detail=INVALID_ALERT)
+    if not save_event(**_process_alert("video", data)):
+        raise HTTPException(status_code=503, detail=WRITER_FULL)
+    return {"status": "ok"}
+
+@app.post("/alerts/batch")
+async def alerts_batch(data: dict):
+    """
+    Bulk ingest: {"alerts": [{"type": "audio" | "video", "label": ...,
+    "confidence": ..., "timestamp": ..., "source": ...}, ...]}.
+    All alerts are queued for the write-behind writer in one go;
+    malformed ones are counted as rejected and the rest stored.
+    """
+
+    alerts = data.get("alerts", [])
+    if len(alerts) > MAX_BATCH_ALERTS:
+        raise HTTPException(status_code=413, detail=f"at most {MAX_BATCH_ALERTS} alerts per batch")
+
+    events = []
+    rejected = 0
+
+    for alert in alerts:
+        event_type = alert.get("type") if isinstance(alert, dict) else None
+        if event_type not in ("audio", "video") or not _valid_alert(alert):
+            rejected += 1
+            continue
+        events.append(_process_alert(event_type, alert))
+
+    queued = save_events(events)
+    if events and not queued:
+        raise HTTPException(status_code=503, detail=WRITER_FULL)
+
+    return {
+        "status": "ok",
+        "accepted": queued,
+        "rejected": rejected,
+        "dropped": len(events) - queued
+    }
+
 @app.get("/events")
-def list_events():
-    return get_all_events()
+def list_events(
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[int] = None,
+    since_id: Optional[int] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    label: Optional[str] = None,
+    type: Optional[str] = None,
+    source: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Newest events first, one page at a time. Pass the X-Next-Cursor
+    response header back as ?cursor= to get the next page.
+
+    Pollers pass ?since_id=<newest id they have> and get the newer
+    events oldest first; while X-Next-Cursor is set they pass it back
+    as ?since_id= until a short page. They also send the last ETag in
+    If-None-Match; while no event has been added the answer is an empty
+    304 without running the query. Events are never updated after
+    insert, so the newest id is enough to tell whether a response changed.
+    """
+
+    etag = f'W/"{latest_event_id()}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    events, next_cursor = query_events(
+        cursor=cursor, limit=limit, since=since, until=until, label=label,
+        event_type=type, source=source, min_confidence=min_confidence,
+        since_id=since_id
+    )
+
+    response.headers["ETag"] = etag
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+
+    return events
+
+@app.get("/stats/writer")
+def writer_stats():
+    return get_writer().stats()
+
+@app.get("/stats/notifications")
+def notification_stats():
+    stats = sms_dispatcher.stats()
+    stats["provider"] = get_notifier().stats()
+    stats["in_flight"] = len(_sms_tasks)
+    return stats
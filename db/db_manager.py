@@ -1,63 +1,315 @@
 import sqlite3
+import queue
+import threading
 from pathlib import Path
 import time
 
+from db.storage import SQLiteStore
+
 DB_PATH = Path(__file__).parent / "alerts.db"
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+# Write-behind settings: rows are committed in one transaction once
+# WRITE_BATCH_SIZE rows are pending or WRITE_FLUSH_INTERVAL has passed
+WRITE_BATCH_SIZE = 500
+WRITE_FLUSH_INTERVAL = 0.2
+WRITE_QUEUE_SIZE = 100000
+
+# A batch that fails to commit (e.g. "database is locked") is retried
+# with exponential backoff before its rows are counted as lost
+WRITE_MAX_RETRIES = 5
+WRITE_RETRY_BACKOFF = 0.2
+
+INSERT_EVENT = """
+INSERT INTO events (event_type, label, confidence, timestamp, sms_sent, source)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
 
-    cursor.execute("""
+SELECT_ALL_EVENTS = """
+SELECT id, event_type, label, confidence, timestamp, sms_sent, source
+FROM events
+ORDER BY id DESC
+"""
+
+SELECT_LATEST_ID = "SELECT MAX(id) FROM events"
+
+SCHEMA = [
+    """
     CREATE TABLE IF NOT EXISTS events (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         event_type TEXT,
         label TEXT,
         confidence REAL,
         timestamp REAL,
-        sms_sent INTEGER DEFAULT 0
+        sms_sent INTEGER DEFAULT 0,
+        source TEXT
     )
-    """)
+    """
+]
+
+# SQLite indexes carry the rowid, so "WHERE label = ? AND id < ?
+# ORDER BY id DESC" walks the label index in id order
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_events_label ON events (label)",
+    "CREATE INDEX IF NOT EXISTS idx_events_type ON events (event_type)",
+    "CREATE INDEX IF NOT EXISTS idx_events_source ON events (source)"
+]
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+store = SQLiteStore(DB_PATH, schema=SCHEMA, indexes=INDEXES)
+
+def _migrate(conn):
+    # Databases created before the source column existed
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(events)")]
+    if "source" not in columns:
+        conn.execute("ALTER TABLE events ADD COLUMN source TEXT")
+
+def init_db():
+    store.init_schema(migrate=_migrate)
+
+class EventWriter:
+    """
+    Write-behind writer for the events table.
+
+    Rows are queued by the request handlers and inserted by a single
+    background thread over one long-lived connection, grouped into one
+    transaction per batch instead of one commit (and fsync) per event.
+
+    Submitting never blocks: when the queue is full the rows are
+    dropped, counted, and the caller is told so it can ask the client
+    to retry.
+    """
+
+    def __init__(self, db_store=store, batch_size=WRITE_BATCH_SIZE,
+                 flush_interval=WRITE_FLUSH_INTERVAL, max_queue=WRITE_QUEUE_SIZE,
+                 max_retries=WRITE_MAX_RETRIES, retry_backoff=WRITE_RETRY_BACKOFF):
+        self.store = db_store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self.running = False
+
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.lost = 0
+        self.dropped = 0
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def submit(self, row):
+        return self.submit_many([row]) == 1
+
+    def submit_many(self, rows):
+        """
+        Returns the number of rows queued: 0 when they do not fit, and
+        fewer than all only if another submitter filled the queue
+        between the check and the puts.
+        """
+
+        rows = list(rows)
+        if self._queue.maxsize and self._queue.qsize() + len(rows) > self._queue.maxsize:
+            self.dropped += len(rows)
+            return 0
+
+        queued = 0
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+                queued += 1
+            except queue.Full:
+                self.dropped += len(rows) - queued
+                break
+        return queued
+
+    def flush(self):
+        """
+        Block until every queued row has been committed.
+        """
+
+        self._queue.join()
 
-    conn.commit()
-    conn.close()
+    def _take_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
 
-def save_event(event_type, label, confidence, timestamp=None, sms_sent=0):
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        # The writer thread's own pooled connection, kept for its lifetime
+        conn = self.store.connection()
+
+        while self.running or not self._queue.empty():
+            batch = self._take_batch()
+            if not batch:
+                continue
+
+            try:
+                self._write(conn, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, conn, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                with conn:
+                    conn.executemany(INSERT_EVENT, batch)
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except sqlite3.OperationalError as e:
+                # Locked or busy database; worth another try
+                if attempt == self.max_retries:
+                    self.lost += len(batch)
+                    print(f"Failed to write {len(batch)} events after {attempt + 1} attempts:", e)
+                    return
+                self.retries += 1
+                time.sleep(self.retry_backoff * (2 ** attempt))
+            except sqlite3.Error:
+                # A row that can never be stored; write the others one by one
+                self._write_rows(conn, batch)
+                return
+
+    def _write_rows(self, conn, batch):
+        for row in batch:
+            try:
+                with conn:
+                    conn.execute(INSERT_EVENT, row)
+                self.written += 1
+            except sqlite3.Error as e:
+                self.lost += 1
+                print(f"Dropped event {row!r}:", e)
+        self.batches += 1
+
+    def stats(self):
+        return {
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "lost": self.lost,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize()
+        }
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = EventWriter().start()
+        return _writer
+
+def _event_row(event_type, label, confidence, timestamp=None, sms_sent=0, source=None):
     if timestamp is None:
         timestamp = time.time()
+    return (event_type, label, confidence, timestamp, sms_sent, source)
+
+def save_event(event_type, label, confidence, timestamp=None, sms_sent=0, source=None):
+    """
+    Queue one event for the write-behind writer; False when the queue
+    is full and the event was dropped.
+    """
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    return get_writer().submit(_event_row(event_type, label, confidence, timestamp, sms_sent, source))
 
-    cursor.execute("""
-    INSERT INTO events (event_type, label, confidence, timestamp, sms_sent)
-    VALUES (?, ?, ?, ?, ?)
-    """, (event_type, label, confidence, timestamp, sms_sent))
+def save_events(events):
+    """
+    Queue many events (dicts with save_event's arguments) at once;
+    returns how many were queued, the rest were dropped.
+    """
 
-    conn.commit()
-    conn.close()
+    return get_writer().submit_many(_event_row(**e) for e in events)
+
+def _row_to_event(r):
+    return {
+        "id": r[0],
+        "type": r[1],
+        "label": r[2],
+        "confidence": r[3],
+        "timestamp": r[4],
+        "sms_sent": r[5],
+        "source": r[6]
+    }
 
 def get_all_events():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    SELECT id, event_type, label, confidence, timestamp, sms_sent
-    FROM events
-    ORDER BY id DESC
-    """)
-
-    rows = cursor.fetchall()
-    conn.close()
-
-    return [
-        {
-            "id": r[0],
-            "type": r[1],
-            "label": r[2],
-            "confidence": r[3],
-            "timestamp": r[4],
-            "sms_sent": r[5]
-        }
-        for r in rows
+    return [_row_to_event(r) for r in store.query(SELECT_ALL_EVENTS)]
+
+def latest_event_id():
+    """
+    Highest event id (0 for an empty table); a rowid lookup, not a scan.
+    """
+
+    return store.query(SELECT_LATEST_ID)[0][0] or 0
+
+def query_events(cursor=None, limit=DEFAULT_PAGE_SIZE, since=None, until=None,
+                 label=None, event_type=None, source=None, min_confidence=None,
+                 since_id=None):
+    """
+    One page of events, newest first, with server-side filters.
+
+    Keyset pagination: cursor is the id of the last event of the
+    previous page, so every page is an index range scan instead of an
+    OFFSET over all earlier rows. Returns (events, next_cursor);
+    next_cursor is None on the last page.
+
+    since_id only returns events newer than that id, for incremental
+    polling. Those pages are oldest first, so a burst larger than one
+    page is read in order: next_cursor is then the since_id of the
+    next page.
+    """
+
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    # Clauses are always added in the same order so each filter
+    # combination maps to one cached prepared statement
+    filters = [
+        ("id < ?", cursor),
+        ("id > ?", since_id),
+        ("timestamp >= ?", since),
+        ("timestamp <= ?", until),
+        ("label = ?", label),
+        ("event_type = ?", event_type),
+        ("source = ?", source),
+        ("confidence >= ?", min_confidence)
     ]
+    clauses = [clause for clause, value in filters if value is not None]
+    params = [value for _, value in filters if value is not None]
+
+    sql = "SELECT id, event_type, label, confidence, timestamp, sms_sent, source FROM events"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY id ASC LIMIT ?" if since_id is not None else " ORDER BY id DESC LIMIT ?"
+
+    events = [_row_to_event(r) for r in store.query(sql, (*params, limit))]
+    next_cursor = events[-1]["id"] if len(events) == limit else None
+
+    return events, next_cursor
@@ -0,0 +1,100 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# sqlite3 keeps this many compiled statements per connection; queries
+# are module-level constants so repeated calls reuse the prepared statement
+CACHED_STATEMENTS = 256
+
+# NORMAL is durable in WAL mode except for the last transactions on power loss
+SYNCHRONOUS = "NORMAL"
+
+# Wait instead of failing immediately when another process holds the write lock
+BUSY_TIMEOUT_MS = 5000
+
+
+class SQLiteStore:
+    """
+    Shared storage layer for the SQLite event stores.
+
+    Each thread gets its own long-lived connection (sqlite3 connections
+    must not be shared across threads), opened in WAL mode so readers
+    never block the writer. Schema statements run once per process via
+    init_schema() instead of before every query.
+    """
+
+    def __init__(self, path, schema=(), indexes=(), synchronous=SYNCHRONOUS):
+        self.path = str(path)
+        self.schema = list(schema)
+        self.indexes = list(indexes)
+        self.synchronous = synchronous
+
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self):
+        # Each connection is only used by the thread that opened it;
+        # check_same_thread is off so close_all() can close them all
+        conn = sqlite3.connect(self.path, cached_statements=CACHED_STATEMENTS, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        return conn
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def init_schema(self, migrate=None):
+        """
+        Create tables and indexes once. migrate(conn) may adjust existing
+        databases (e.g. add columns); it runs in the same transaction,
+        after the tables and before the indexes.
+        """
+
+        with self._lock:
+            if self._schema_ready:
+                return
+
+        conn = self.connection()
+        with conn:
+            for statement in self.schema:
+                conn.execute(statement)
+            if migrate is not None:
+                migrate(conn)
+            for statement in self.indexes:
+                conn.execute(statement)
+
+        with self._lock:
+            self._schema_ready = True
+
+    @contextmanager
+    def transaction(self):
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    def execute(self, sql, params=()):
+        with self.transaction() as conn:
+            return conn.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        with self.transaction() as conn:
+            conn.executemany(sql, rows)
+
+    def query(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchall()
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
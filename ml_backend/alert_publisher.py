@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = "http://127.0.0.1:8000"
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Alerts that could not be delivered are appended here and replayed
+# once the API is reachable again
+SPILL_PATH = os.path.join(BASE_DIR, "alert_spill.jsonl")
+
+MAX_QUEUE = 1000
+BATCH_SIZE = 50
+FLUSH_INTERVAL = 0.5
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 0.5
+REQUEST_TIMEOUT = 2.0
+
+# Client errors that may succeed later; any other 4xx is permanent and
+# the alert is dropped instead of being retried and spilled
+RETRYABLE_STATUS = (404, 405, 408, 429)
+
+
+class AlertPublisher:
+    """
+    Takes alerts from the detection loops without ever blocking them.
+
+    publish() appends to a bounded queue (the oldest alert is dropped
+    when it is full). A background thread sends alerts in batches over
+    a pooled HTTP session, retries with exponential backoff and spills
+    to a local JSONL file when the API stays unreachable. Alerts the API
+    rejects (e.g. 413, 422) are logged and dropped.
+    """
+
+    def __init__(self, api_url=API_URL, max_queue=MAX_QUEUE, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, max_retries=MAX_RETRIES,
+                 backoff=BACKOFF_SECONDS, timeout=REQUEST_TIMEOUT, spill_path=SPILL_PATH):
+        self.api_url = api_url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.spill_path = spill_path
+
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+        # Falls back to one request per alert if the API has no batch endpoint
+        self._batch_supported = True
+
+        self._queue = deque(maxlen=max_queue)
+        self._cond = threading.Condition()
+        self._thread = None
+        self.running = False
+
+        self.published = 0
+        self.sent = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.rejected = 0
+        self.failures = 0
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="alert-publisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        """
+        Stop the sender; alerts still queued are sent or spilled.
+        """
+
+        self.running = False
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def publish(self, kind, alert):
+        """
+        kind is "audio" or "video". Never blocks.
+        """
+
+        item = dict(alert, type=kind)
+        item.setdefault("timestamp", time.time())
+
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(item)
+            self.published += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+
+    def _take_batch(self):
+        with self._cond:
+            if len(self._queue) < self.batch_size and self.running:
+                self._cond.wait(timeout=self.flush_interval)
+
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popleft())
+            return batch
+
+    def _run(self):
+        while self.running or self._queue:
+            batch = self._take_batch()
+            if not batch:
+                continue
+
+            undelivered = self._deliver(batch)
+            if undelivered:
+                self._spill(undelivered)
+            else:
+                self._replay_spill()
+
+    def _rejected(self, r, count):
+        if 400 <= r.status_code < 500 and r.status_code not in RETRYABLE_STATUS:
+            print(f"API rejected {count} alert(s) with {r.status_code}: {r.text[:200]}")
+            return True
+        return False
+
+    def _post(self, pending):
+        """
+        Removes each alert from pending once it is delivered or rejected,
+        so on an error only the undelivered alerts are left to retry.
+        """
+
+        if self._batch_supported:
+            r = self.session.post(f"{self.api_url}/alerts/batch", json={"alerts": pending}, timeout=self.timeout)
+            if r.status_code not in (404, 405):
+                if not self._rejected(r, len(pending)):
+                    r.raise_for_status()
+                    self.sent += len(pending)
+                    pending.clear()
+                    return
+                if len(pending) == 1:
+                    self.rejected += 1
+                    pending.clear()
+                    return
+                # Send this batch one by one so only the bad alerts are dropped
+            else:
+                self._batch_supported = False
+
+        while pending:
+            alert = pending[0]
+            payload = {k: v for k, v in alert.items() if k != "type"}
+            r = self.session.post(f"{self.api_url}/{alert['type']}_alert", json=payload, timeout=self.timeout)
+            if self._rejected(r, 1):
+                self.rejected += 1
+            else:
+                r.raise_for_status()
+                self.sent += 1
+            pending.pop(0)
+
+    def _deliver(self, batch):
+        """
+        Returns the alerts that could not be delivered (empty on success).
+        """
+
+        pending = list(batch)
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._post(pending)
+                return []
+            except requests.RequestException as e:
+                self.failures += 1
+                if attempt == self.max_retries:
+                    print(f"Alert delivery failed after {attempt + 1} attempts:", e)
+                    return pending
+                time.sleep(self.backoff * (2 ** attempt))
+
+        return pending
+
+    def _spill(self, batch):
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for alert in batch:
+                f.write(json.dumps(alert) + "\n")
+        self.spilled += len(batch)
+
+    def _replay_spill(self):
+        if not os.path.exists(self.spill_path):
+            return
+
+        with open(self.spill_path, encoding="utf-8") as f:
+            alerts = [json.loads(line) for line in f if line.strip()]
+        os.remove(self.spill_path)
+
+        print(f"Replaying {len(alerts)} spilled alerts...")
+        for i in range(0, len(alerts), self.batch_size):
+            undelivered = self._deliver(alerts[i:i + self.batch_size])
+            if undelivered:
+                # Put back everything that was not delivered; rejected
+                # alerts are not replayed again
+                self._spill(undelivered + alerts[i + self.batch_size:])
+                return
+
+    def stats(self):
+        with self._cond:
+            queued = len(self._queue)
+
+        return {
+            "published": self.published,
+            "sent": self.sent,
+            "queued": queued,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "rejected": self.rejected,
+            "failures": self.failures
+        }
@@ -0,0 +1,201 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from mel_features import SAMPLE_RATE, N_MELS, HOP_LENGTH
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Shared by test_audio_model, generate_spectrograms and build_feature_cache
+CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join(BASE_DIR, ".audio_cache"))
+
+# Least recently used entries are deleted beyond this size
+MAX_CACHE_MB = int(os.getenv("AUDIO_CACHE_MAX_MB", "2048"))
+
+HASH_CHUNK = 1 << 20
+
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class AudioFeatureCache:
+    """
+    Persistent cache of decoded, resampled audio and its log-mel
+    spectrogram, keyed by (content hash, sr, n_mels, hop_length).
+
+    Each entry is a mel .npy file plus, when store_audio is set, one
+    for the audio, written atomically, so several processes can share
+    one cache directory. A hit bumps the entry's mtime; when the
+    directory grows beyond max_bytes, the entries with the oldest mtime
+    are deleted (LRU).
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_MB * 1024 * 1024, store_audio=True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.store_audio = store_audio
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # (path, size, mtime_ns) -> content hash, so unchanged files are
+        # not re-read within a process
+        self._hashes = {}
+        self._lock = threading.Lock()
+        self._size = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def _digest(self, path):
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        digest = self._hashes.get(key)
+        if digest is None:
+            digest = file_hash(path)
+            self._hashes[key] = digest
+        return digest
+
+    def _paths(self, digest, sr, n_mels, hop_length):
+        stem = os.path.join(self.cache_dir, f"{digest}_{sr}_{n_mels}_{hop_length}")
+        return stem + ".audio.npy", stem + ".mel.npy"
+
+    def get(self, path, sr=SAMPLE_RATE, n_mels=N_MELS, hop_length=HOP_LENGTH, digest=None):
+        """
+        Returns (audio, mel_db) for an audio file, computing and storing
+        them on a miss. digest may pass a precomputed file_hash(). On a
+        hit the audio is memory-mapped, so only the samples used are read.
+        """
+
+        digest = digest or self._digest(path)
+        audio_path, mel_path = self._paths(digest, sr, n_mels, hop_length)
+
+        try:
+            audio = np.load(audio_path, mmap_mode="r")
+            mel_db = np.load(mel_path)
+            os.utime(audio_path)
+            os.utime(mel_path)
+            self.hits += 1
+            return audio, mel_db
+        except (OSError, ValueError):
+            pass
+
+        return self._compute(path, audio_path, mel_path, sr, n_mels, hop_length, store_audio=True)
+
+    def get_mel(self, path, sr=SAMPLE_RATE, n_mels=N_MELS, hop_length=HOP_LENGTH, digest=None,
+                store_audio=None):
+        """
+        Only the mel spectrogram; the cached audio is never read.
+        store_audio overrides the cache's setting for a miss.
+        """
+
+        digest = digest or self._digest(path)
+        audio_path, mel_path = self._paths(digest, sr, n_mels, hop_length)
+
+        try:
+            mel_db = np.load(mel_path)
+            os.utime(mel_path)
+            self.hits += 1
+            return mel_db
+        except (OSError, ValueError):
+            pass
+
+        store_audio = self.store_audio if store_audio is None else store_audio
+        _, mel_db = self._compute(path, audio_path, mel_path, sr, n_mels, hop_length, store_audio)
+        return mel_db
+
+    def _compute(self, path, audio_path, mel_path, sr, n_mels, hop_length, store_audio):
+        import librosa
+        from mel_features import compute_mel_db
+
+        self.misses += 1
+        audio, _ = librosa.load(path, sr=sr)
+        mel_db = compute_mel_db(audio, sr=sr, n_mels=n_mels, hop_length=hop_length)
+
+        if store_audio:
+            self._store(audio_path, audio.astype(np.float32))
+        self._store(mel_path, mel_db.astype(np.float32))
+        self._evict()
+
+        return audio, mel_db
+
+    def _store(self, path, array):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._size is not None:
+                self._size += os.path.getsize(path)
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".npy"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            # Directory is only scanned on first use and when over the limit
+            if self._size is not None and self._size <= self.max_bytes:
+                return
+
+            entries = self._entries()
+            size = sum(e[1] for e in entries)
+
+            for _, entry_size, path in sorted(entries):
+                if size <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    size -= entry_size
+                except OSError:
+                    pass
+
+            self._size = size
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                os.remove(path)
+            self._size = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes": self._size
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Process-wide cache in CACHE_DIR, created on first use.
+    """
+
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AudioFeatureCache()
+        return _cache
+
+
+def load_audio_features(path, sr=SAMPLE_RATE, n_mels=N_MELS, hop_length=HOP_LENGTH, digest=None):
+    return get_cache().get(path, sr, n_mels, hop_length, digest)
+
+
+def load_mel(path, sr=SAMPLE_RATE, n_mels=N_MELS, hop_length=HOP_LENGTH, digest=None, store_audio=None):
+    return get_cache().get_mel(path, sr, n_mels, hop_length, digest, store_audio)
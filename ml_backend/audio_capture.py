@@ -1,25 +1,18 @@
-import sounddevice as sd
 import numpy as np
 import librosa
 import librosa.display
 import matplotlib.pyplot as plt
-import queue
+from audio_stream import AudioStream
 
 SAMPLE_RATE = 22050      
 DURATION = 2              
-
-audio_queue = queue.Queue()
-
-def audio_callback(indata, frames, time, status):
-    audio_queue.put(indata.copy())
+HOP = 0.25
 
 def record_audio():
     print("Recording audio... Press CTRL+C to stop.")
     
-    with sd.InputStream(channels=1, samplerate=SAMPLE_RATE, callback=audio_callback):
-        while True:
-            audio_data = audio_queue.get().flatten()
-    
+    with AudioStream(sample_rate=SAMPLE_RATE, window_seconds=DURATION, hop_seconds=HOP) as stream:
+        for audio_data in stream.windows():
             mel = librosa.feature.melspectrogram(y=audio_data, sr=SAMPLE_RATE, n_mels=128)
             mel_db = librosa.power_to_db(mel, ref=np.max)
 
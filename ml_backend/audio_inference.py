@@ -0,0 +1,117 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+CLASSES = ["scream", "glass_break", "alarm", "normal"]
+
+# Windows grouped into one model call
+MAX_BATCH = 32
+# How long the first window of a batch waits for others to arrive
+MAX_WAIT_MS = 10
+
+
+class AudioInferenceService:
+    """
+    Shared audio classifier for many microphones.
+
+    Each microphone loop calls submit(mic_id, mel_input) with a 128x128
+    log-mel image and gets a Future. A background thread stacks pending
+    windows into one batch and runs it through the inference backend
+    (a compiled model(x, training=False) for Keras instead of predict(),
+    which rebuilds a dataset and callback loop on every call).
+    """
+
+    def __init__(self, backend, classes=CLASSES, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.backend = backend
+        self.classes = classes
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self.batches = 0
+        self.windows = 0
+        self.last_batch_ms = 0.0
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._batch_loop, name="audio-inference", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def predict_batch(self, mel_inputs):
+        """
+        Classify a list/array of (128, 128) log-mel images in one call.
+        Returns a list of (label, confidence).
+        """
+
+        x = np.asarray(mel_inputs, dtype=np.float32)[..., np.newaxis]
+
+        start = time.perf_counter()
+        preds = self.backend.predict_batch(x)
+        self.last_batch_ms = (time.perf_counter() - start) * 1000
+
+        self.batches += 1
+        self.windows += len(x)
+
+        idx = preds.argmax(axis=1)
+        return [(self.classes[i], float(p[i])) for i, p in zip(idx, preds)]
+
+    def predict(self, mel_input):
+        return self.predict_batch([mel_input])[0]
+
+    def submit(self, mic_id, mel_input):
+        future = Future()
+        self._queue.put((mic_id, mel_input, future))
+        return future
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _batch_loop(self):
+        while self.running:
+            batch = self._collect()
+            if not batch:
+                continue
+
+            try:
+                results = self.predict_batch([mel for _, mel, _ in batch])
+                for (_, _, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "windows": self.windows,
+            "avg_batch_size": round(self.windows / self.batches, 2) if self.batches else 0,
+            "last_batch_ms": round(self.last_batch_ms, 1),
+            "queued": self._queue.qsize()
+        }
@@ -0,0 +1,182 @@
+import threading
+import numpy as np
+import sounddevice as sd
+
+SAMPLE_RATE = 22050
+
+# Analysis window and how often a new window is produced
+WINDOW_SECONDS = 2.0
+HOP_SECONDS = 0.25
+
+# Audio kept in the ring buffer beyond one window, so a consumer that
+# is briefly slower than real time does not lose samples
+BUFFER_SECONDS = 10.0
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size float32 ring buffer addressed by absolute sample position.
+    The capture callback writes, one consumer thread reads.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=np.float32)
+        self.written = 0
+        self._cond = threading.Condition()
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        n = len(samples)
+        if n >= self.capacity:
+            samples = samples[-self.capacity:]
+            skipped = n - self.capacity
+            n = self.capacity
+        else:
+            skipped = 0
+
+        with self._cond:
+            start = (self.written + skipped) % self.capacity
+            end = start + n
+            if end <= self.capacity:
+                self.data[start:end] = samples
+            else:
+                split = self.capacity - start
+                self.data[start:] = samples[:split]
+                self.data[:end - self.capacity] = samples[split:]
+
+            self.written += skipped + n
+            self._cond.notify_all()
+
+    def read(self, start, n):
+        """
+        Copy of samples [start, start + n). The caller must make sure the
+        range has been written and not yet overwritten.
+        """
+
+        i = start % self.capacity
+        if i + n <= self.capacity:
+            return self.data[i:i + n].copy()
+        return np.concatenate((self.data[i:], self.data[:i + n - self.capacity]))
+
+    def wait_for(self, position, timeout=None):
+        """
+        Block until at least `position` samples have been written.
+        """
+
+        with self._cond:
+            return self._cond.wait_for(lambda: self.written >= position, timeout=timeout)
+
+
+class AudioStream:
+    """
+    Continuous microphone capture through a callback-based
+    sd.InputStream. Capture never stops while the consumer runs
+    inference; the consumer pulls overlapping windows or raw hops
+    from the ring buffer.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, window_seconds=WINDOW_SECONDS,
+                 hop_seconds=HOP_SECONDS, device=None, buffer_seconds=BUFFER_SECONDS):
+        self.sample_rate = sample_rate
+        self.window = int(window_seconds * sample_rate)
+        self.hop = int(hop_seconds * sample_rate)
+        self.device = device
+        self.ring = AudioRingBuffer(max(int(buffer_seconds * sample_rate), 2 * self.window))
+
+        # Samples lost because the consumer fell behind the ring buffer
+        self.overruns = 0
+        # Windows skipped by windows() to stay close to real time
+        self.skipped_windows = 0
+
+        self._stream = None
+        self._position = 0
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            print("Audio stream status:", status)
+        self.ring.write(indata[:, 0])
+
+    def start(self):
+        self._stream = sd.InputStream(
+            channels=1,
+            samplerate=self.sample_rate,
+            device=self.device,
+            dtype="float32",
+            callback=self._callback
+        )
+        self._stream.start()
+        self._position = self.ring.written
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def backlog(self):
+        """
+        Samples captured but not yet handed to the consumer.
+        """
+
+        return self.ring.written - self._position
+
+    def _next_hop_end(self):
+        end = self._position + self.hop
+        while self._stream is not None and not self.ring.wait_for(end, timeout=1.0):
+            pass
+
+        # Consumer fell behind the ring buffer, skip ahead
+        oldest = self.ring.written - self.ring.capacity
+        if self._position < oldest:
+            self.overruns += oldest - self._position
+            self._position = oldest
+            end = self._position + self.hop
+
+        return end
+
+    def hops(self):
+        """
+        Yields every new hop of samples in order, without gaps unless
+        the consumer falls more than the buffer length behind.
+        """
+
+        while self._stream is not None:
+            end = self._next_hop_end()
+            if self._stream is None:
+                break
+
+            chunk = self.ring.read(self._position, end - self._position)
+            self._position = end
+            yield chunk
+
+    def windows(self):
+        """
+        Yields the latest `window_seconds` of audio every hop. When
+        inference is slower than the hop, stale windows are skipped so
+        results stay close to real time.
+        """
+
+        self.ring.wait_for(self._position + self.window)
+        self._position = max(self._position, self.ring.written - self.window)
+
+        while self._stream is not None:
+            end = self._next_hop_end()
+            if self._stream is None:
+                break
+
+            latest = self.ring.written
+            if latest - end >= self.hop:
+                self.skipped_windows += (latest - end) // self.hop
+                end = latest
+
+            self._position = end
+            yield self.ring.read(end - self.window, self.window)
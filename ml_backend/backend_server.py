@@ -1,14 +1,22 @@
 
-import os
-import sqlite3
 import json
 import asyncio
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from typing import Dict, Optional
 from pathlib import Path
 
-from .event_manager import init_db
+from .event_manager import init_db, get_latest_events, query_events, log_event, dispatcher, confirmation
+from .event_bus import bus
+
+# Messages waiting per client; when full the oldest are dropped
+CLIENT_QUEUE_SIZE = 64
+
+# A client that cannot take a message within this time is disconnected
+SEND_TIMEOUT = 2.0
+
+# Disconnect clients that needed this many drops in a row
+MAX_CONSECUTIVE_DROPS = 256
 
 app = FastAPI(title="Suspicious Activity Backend")
 
@@ -18,73 +26,172 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "db", "security.db")
-
+# Schema is created once at startup, not per request
 init_db()
 
+class ClientConnection:
+    """
+    One WebSocket client with its own bounded send queue and sender task,
+    so a slow client only ever delays itself.
+    """
+
+    def __init__(self, ws: WebSocket):
+        self.ws = ws
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.sent = 0
+        self.dropped = 0
+        self.consecutive_drops = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def offer(self, message: dict) -> bool:
+        """
+        Queue a message without waiting. When the queue is full the
+        oldest message is dropped. Returns False once the client is too
+        far behind and should be disconnected.
+        """
+
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.consecutive_drops += 1
+        else:
+            self.consecutive_drops = 0
+
+        self.queue.put_nowait(message)
+        return self.consecutive_drops < MAX_CONSECUTIVE_DROPS
+
+    async def run(self):
+        while True:
+            messages = [await self.queue.get()]
+
+            # Coalesce everything that piled up into one frame
+            while not self.queue.empty():
+                messages.append(self.queue.get_nowait())
+
+            payload = messages[0] if len(messages) == 1 else messages
+            await asyncio.wait_for(self.ws.send_text(json.dumps(payload)), SEND_TIMEOUT)
+            self.sent += len(messages)
+
+
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self.slow_disconnects = 0
 
     async def connect(self, ws: WebSocket):
         await ws.accept()
-        self.active_connections.append(ws)
+        client = ClientConnection(ws)
+        client.task = asyncio.create_task(self._send_loop(client))
+        self.active_connections[ws] = client
 
     def disconnect(self, ws: WebSocket):
-        self.active_connections.remove(ws)
+        client = self.active_connections.pop(ws, None)
+        if client is not None and client.task is not None:
+            client.task.cancel()
 
-    async def broadcast(self, message: dict):
-        text = json.dumps(message)
-        for conn in list(self.active_connections):
+    async def _send_loop(self, client: ClientConnection):
+        try:
+            await client.run()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # Send failed or timed out
+            self.slow_disconnects += 1
+            self.disconnect(client.ws)
             try:
-                await conn.send_text(text)
+                await client.ws.close()
             except Exception:
-                self.disconnect(conn)
+                pass
+
+    def broadcast(self, message: dict):
+        """
+        Fan a message out to every client queue. Never awaits a send,
+        must be called on the event loop thread.
+        """
+
+        for ws, client in list(self.active_connections.items()):
+            if not client.offer(message):
+                self.slow_disconnects += 1
+                self.disconnect(ws)
+                asyncio.create_task(ws.close())
+
+    def metrics(self) -> dict:
+        clients = list(self.active_connections.values())
+        depths = [c.queue.qsize() for c in clients]
+        return {
+            "connected_clients": len(clients),
+            "queued_messages": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "sent": sum(c.sent for c in clients),
+            "dropped": sum(c.dropped for c in clients),
+            "slow_disconnects": self.slow_disconnects,
+            "bus_published": bus.published
+        }
 
 manager = ConnectionManager()
 
+@app.on_event("startup")
+async def connect_event_bus():
+    # log_event runs on worker threads; hop onto the event loop to broadcast
+    loop = asyncio.get_running_loop()
+    bus.subscribe(lambda event: loop.call_soon_threadsafe(manager.broadcast, event))
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/metrics/ws")
+def ws_metrics():
+    return manager.metrics()
+
+@app.get("/metrics/notifications")
+def notification_metrics():
+    return dispatcher.stats()
+
+@app.get("/metrics/confirmation")
+def confirmation_metrics():
+    return confirmation.stats()
+
+@app.post("/alerts")
+def post_alert(data: dict):
+    """
+    Detectors in other processes report detections here; confirmed
+    events are stored and pushed to every WebSocket client.
+    """
+
+    return log_event(
+        source=data["source"],
+        event_type=data["event_type"],
+        confidence=float(data["confidence"]),
+        meta=data.get("meta")
+    )
+
 @app.get("/alerts/latest")
 def get_latest(n: int = 20):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT id, timestamp, source, event_type, confidence, meta FROM events ORDER BY id DESC LIMIT ?", (n,))
-    rows = cur.fetchall()
-    conn.close()
-    events = []
-    for r in rows:
-        events.append({
-            "id": r[0],
-            "timestamp": r[1],
-            "source": r[2],
-            "event_type": r[3],
-            "confidence": r[4],
-            "meta": json.loads(r[5] or "{}")
-        })
-    return events
+    return get_latest_events(n)
 
 @app.get("/alerts/all")
-def get_all(limit: int = 1000):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT id, timestamp, source, event_type, confidence, meta FROM events ORDER BY id DESC LIMIT ?", (limit,))
-    rows = cur.fetchall()
-    conn.close()
-    events = []
-    for r in rows:
-        events.append({
-            "id": r[0],
-            "timestamp": r[1],
-            "source": r[2],
-            "event_type": r[3],
-            "confidence": r[4],
-            "meta": json.loads(r[5] or "{}")
-        })
+def get_all(
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[int] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    source: Optional[str] = None,
+    event_type: Optional[str] = None,
+    min_confidence: Optional[float] = None
+):
+    events, next_cursor = query_events(
+        cursor=cursor, limit=limit, since=since, until=until,
+        source=source, event_type=event_type, min_confidence=min_confidence
+    )
+
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+
     return events
 
 @app.websocket("/ws/alerts")
@@ -0,0 +1,308 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from inference_backend import yolo_model_path
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mkv", ".mov", ".m4v", ".ts"}
+
+# Run the detector on every STRIDE-th frame; skipped frames are only
+# grab()bed, which skips the colour conversion and copy of read()
+STRIDE = 5
+
+# Same sequence length as the live loop
+SEQUENCE_LENGTH = 16
+
+# Intra-op threads per worker; workers x threads should match the cores
+THREADS_PER_WORKER = 1
+
+DETECTION_COLUMNS = ["file", "frame", "time_s", "label", "confidence", "x1", "y1", "x2", "y2"]
+SEQUENCE_COLUMNS = ["file", "start_frame", "end_frame", "suspicious", "violations"]
+
+# Set in each worker process by _init_worker
+_detector = None
+
+
+def find_videos(directory):
+    return sorted(
+        str(p) for p in Path(directory).rglob("*")
+        if p.suffix.lower() in VIDEO_EXTENSIONS
+    )
+
+
+def _init_worker(model_path, threads):
+    """
+    Runs once per process: load one model and pin the thread pools so
+    the workers do not oversubscribe the CPU.
+    """
+
+    global _detector
+
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    from models.yolo_model import YOLODetector
+    _detector = YOLODetector(model_path)
+
+
+def analyze_file(path, part=None, stride=STRIDE, sequence_length=SEQUENCE_LENGTH, camera=None):
+    """
+    Detections and sequence decisions for one video file, as column
+    lists. camera selects the zone rules (defaults to the file stem);
+    only detections of labels those rules use are kept.
+
+    With part, both tables are written there by the worker (see
+    write_output) and only the stats are returned, so detections never
+    travel back to the parent process.
+    """
+
+    from video_processing import SequenceAnalyzer
+    from zones import compile_rules
+
+    detections = {c: [] for c in DETECTION_COLUMNS}
+    sequences = {c: [] for c in SEQUENCE_COLUMNS}
+
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    start = time.perf_counter()
+
+    analyzer = None
+    roi_offset = (0, 0)
+    buffer, indices = [], []
+    frame_index = -1
+    decoded = inferred = 0
+
+    def flush():
+        nonlocal inferred
+        _, per_frame = _detector.detect_frames(buffer, annotate=False)
+        inferred += len(buffer)
+
+        for index, frame_detections in zip(indices, per_frame):
+            for d in frame_detections:
+                if d["label"] not in analyzer.rules.labels:
+                    continue
+                x1, y1, x2, y2 = d["bbox"]
+                ox, oy = roi_offset
+                for column, value in zip(DETECTION_COLUMNS, (
+                    path, index, index / fps, d["label"], d["confidence"],
+                    x1 + ox, y1 + oy, x2 + ox, y2 + oy
+                )):
+                    detections[column].append(value)
+
+        # Video time, so dwell rules use footage time, not wall time
+        violations, final_decision = analyzer.update(per_frame, roi_offset, now=indices[-1] / fps)
+        sequences["file"].append(path)
+        sequences["start_frame"].append(indices[0])
+        sequences["end_frame"].append(indices[-1])
+        sequences["suspicious"].append(bool(final_decision))
+        sequences["violations"].append(",".join(sorted({f"{v['zone']}:{v['rule']}" for v in violations})))
+
+        buffer.clear()
+        indices.clear()
+
+    while True:
+        frame_index += 1
+        if frame_index % stride:
+            if not cap.grab():
+                break
+            continue
+
+        ret, frame = cap.read()
+        if not ret:
+            break
+        decoded += 1
+
+        if analyzer is None:
+            rules = compile_rules(camera or Path(path).stem, frame.shape)
+            analyzer = SequenceAnalyzer(rules)
+
+        roi, roi_offset = analyzer.rules.crop(frame)
+        buffer.append(roi)
+        indices.append(frame_index)
+
+        if len(buffer) == sequence_length:
+            flush()
+
+    if buffer:
+        flush()
+
+    cap.release()
+
+    stats = {
+        "file": path,
+        "frames": frame_index,
+        "video_seconds": frame_index / fps,
+        "decoded": decoded,
+        "inferred": inferred,
+        "detections": len(detections["label"]),
+        "seconds": time.perf_counter() - start
+    }
+
+    if part is None:
+        return detections, sequences, stats
+
+    write_output(part, detections, sequences)
+    return stats
+
+
+def _sequences_path(out):
+    return Path(out).with_suffix(".sequences.parquet")
+
+
+def _schemas(pl):
+    # Explicit types, so parts of files without detections still concatenate
+    detections = {
+        "file": pl.Utf8, "frame": pl.Int64, "time_s": pl.Float64, "label": pl.Utf8,
+        "confidence": pl.Float64, "x1": pl.Int64, "y1": pl.Int64, "x2": pl.Int64, "y2": pl.Int64
+    }
+    sequences = {
+        "file": pl.Utf8, "start_frame": pl.Int64, "end_frame": pl.Int64,
+        "suspicious": pl.Boolean, "violations": pl.Utf8
+    }
+    return detections, sequences
+
+
+def write_output(out, detections, sequences):
+    """
+    .parquet writes detections to out and sequences next to it
+    (polars); anything else is one compressed NPZ with
+    det_/seq_-prefixed columns.
+    """
+
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    if out.suffix == ".parquet":
+        import polars as pl
+
+        det_schema, seq_schema = _schemas(pl)
+        pl.DataFrame(detections, schema=det_schema).write_parquet(out)
+        pl.DataFrame(sequences, schema=seq_schema).write_parquet(_sequences_path(out))
+    else:
+        arrays = {f"det_{c}": np.asarray(v) for c, v in detections.items()}
+        arrays.update({f"seq_{c}": np.asarray(v) for c, v in sequences.items()})
+        np.savez_compressed(out, **arrays)
+
+
+def merge_parts(parts, out):
+    """
+    Concatenates the per-file parts into out. Parquet parts are
+    streamed by polars; NPZ parts are merged one column at a time.
+    """
+
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    if out.suffix == ".parquet":
+        import polars as pl
+
+        pl.scan_parquet([str(p) for p in parts]).sink_parquet(out)
+        pl.scan_parquet([str(_sequences_path(p)) for p in parts]).sink_parquet(_sequences_path(out))
+        return
+
+    with np.load(parts[0]) as first:
+        columns = list(first.files)
+
+    arrays = {}
+    for column in columns:
+        pieces = []
+        for p in parts:
+            with np.load(p) as part:
+                pieces.append(part[column])
+        non_empty = [a for a in pieces if len(a)] or pieces[:1]
+        arrays[column] = np.concatenate(non_empty)
+    np.savez_compressed(out, **arrays)
+
+
+def run(directory, out, workers=None, stride=STRIDE, sequence_length=SEQUENCE_LENGTH,
+        model_path=None, threads=THREADS_PER_WORKER):
+    files = find_videos(directory)
+    if not files:
+        print(f"No video files in {directory}")
+        return
+
+    workers = workers or max(1, (os.cpu_count() or 1) // threads)
+    model_path = model_path or yolo_model_path()
+    print(f"Analyzing {len(files)} files with {workers} workers (stride {stride})...")
+
+    start = time.perf_counter()
+    all_stats, parts = [], {}
+
+    # Largest files first so one big file does not finish last alone
+    files.sort(key=os.path.getsize, reverse=True)
+
+    # Each worker writes its own part per file; the parent only gets stats
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    parts_dir = Path(tempfile.mkdtemp(prefix=f".{out.stem}.parts.", dir=out.parent))
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(model_path, threads)
+        ) as pool:
+            futures = {}
+            for i, f in enumerate(files):
+                part = parts_dir / f"{i:06d}{'.parquet' if out.suffix == '.parquet' else '.npz'}"
+                futures[pool.submit(analyze_file, f, part, stride, sequence_length)] = (f, part)
+
+            for future in as_completed(futures):
+                path, part = futures[future]
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    print(f"{path}: failed ({e})")
+                    continue
+
+                parts[path] = part
+                all_stats.append(stats)
+                print(
+                    f"{stats['file']}: {stats['frames']} frames, {stats['inferred']} inferred, "
+                    f"{stats['video_seconds'] / max(stats['seconds'], 1e-9):.1f}x realtime"
+                )
+
+        if not all_stats:
+            return
+
+        # Rows ordered by file path, not by completion order
+        merge_parts([parts[f] for f in sorted(parts)], out)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    wall = time.perf_counter() - start
+    frames = sum(s["frames"] for s in all_stats)
+    inferred = sum(s["inferred"] for s in all_stats)
+    video_seconds = sum(s["video_seconds"] for s in all_stats)
+
+    print("\nThroughput")
+    print(f"  files:            {len(all_stats)}/{len(files)}")
+    print(f"  footage:          {video_seconds / 3600:.2f} h")
+    print(f"  wall time:        {wall:.1f} s")
+    print(f"  frames/s (video): {frames / wall:.1f}")
+    print(f"  frames/s (model): {inferred / wall:.1f}")
+    print(f"  realtime factor:  {video_seconds / wall:.1f}x")
+    print(f"  detections:       {sum(s['detections'] for s in all_stats)} -> {out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze a directory of recorded video files")
+    parser.add_argument("directory", help="directory searched recursively for video files")
+    parser.add_argument("--out", default="detections.parquet", help=".parquet or .npz output")
+    parser.add_argument("--workers", type=int, help="worker processes (default: cores / threads)")
+    parser.add_argument("--threads", type=int, default=THREADS_PER_WORKER, help="threads per worker")
+    parser.add_argument("--stride", type=int, default=STRIDE, help="infer every n-th frame")
+    parser.add_argument("--sequence", type=int, default=SEQUENCE_LENGTH, help="frames per batch")
+    parser.add_argument("--model", help="YOLO weights or ONNX file (default: INFERENCE_BACKEND)")
+    args = parser.parse_args()
+
+    run(args.directory, args.out, args.workers, args.stride, args.sequence, args.model, args.threads)
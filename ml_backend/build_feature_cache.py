@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from mel_features import SAMPLE_RATE, N_MELS, HOP_LENGTH, MODEL_INPUT_SIZE
+from audio_cache import file_hash
+
+AUDIO_DATASET_PATH = "audio_dataset"
+CACHE_DIR = "feature_cache"
+
+CLASSES = ["scream", "glass_break", "alarm", "normal"]
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg")
+
+FEATURES_FILE = "features.npy"
+LABELS_FILE = "labels.npy"
+INDEX_FILE = "index.json"
+
+# Bump when the feature computation changes to invalidate old caches
+CACHE_VERSION = 1
+
+
+def list_audio_files(dataset_path=AUDIO_DATASET_PATH, classes=CLASSES):
+    files = []
+    for label, name in enumerate(classes):
+        class_path = os.path.join(dataset_path, name)
+        if not os.path.isdir(class_path):
+            continue
+        for file in sorted(os.listdir(class_path)):
+            if file.lower().endswith(AUDIO_EXTENSIONS):
+                files.append((os.path.join(class_path, file), label))
+    return files
+
+
+def compute_features(path, digest=None):
+    """
+    The exact input the live detector feeds the model:
+    to_model_input(compute_mel_db(audio)), stored as float16. The mel
+    comes from the shared audio cache when another tool already
+    computed it; the decoded audio is not added to that cache.
+    """
+
+    from audio_cache import load_mel
+    from mel_features import to_model_input
+
+    mel_db = load_mel(path, SAMPLE_RATE, N_MELS, HOP_LENGTH, digest, store_audio=False)
+    return to_model_input(mel_db).astype(np.float16)
+
+
+def _settings():
+    return {
+        "version": CACHE_VERSION,
+        "sample_rate": SAMPLE_RATE,
+        "n_mels": N_MELS,
+        "hop_length": HOP_LENGTH,
+        "shape": list(MODEL_INPUT_SIZE[::-1])
+    }
+
+
+def load_index(cache_dir=CACHE_DIR):
+    path = os.path.join(cache_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_features(cache_dir=CACHE_DIR, mmap_mode="r"):
+    """
+    (features, labels, index): features is a memory-mapped
+    (N, 128, 128) float16 array, labels an (N,) int array of class ids.
+    """
+
+    features = np.load(os.path.join(cache_dir, FEATURES_FILE), mmap_mode=mmap_mode)
+    labels = np.load(os.path.join(cache_dir, LABELS_FILE))
+    index = load_index(cache_dir)
+
+    # A build interrupted between the file swaps leaves them out of step
+    expected = [e["label"] for e in index["entries"]] if index else None
+    if expected is None or len(features) != len(expected) or labels.tolist() != expected:
+        raise ValueError(f"Feature cache in {cache_dir} is incomplete; run build_feature_cache.py again")
+
+    return features, labels, index
+
+
+def _hash_files(files, old_entries):
+    """
+    Content hash per file; files whose size and mtime match the old
+    index reuse its hash instead of being read again.
+    """
+
+    hashes = []
+    for path, _ in files:
+        st = os.stat(path)
+        old = old_entries.get(path)
+        if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+            hashes.append(old["hash"])
+        else:
+            hashes.append(file_hash(path))
+    return hashes
+
+
+def build_cache(dataset_path=AUDIO_DATASET_PATH, cache_dir=CACHE_DIR, workers=None):
+    """
+    Computes features only for files whose content hash is not in the
+    existing cache; rows of unchanged files are copied from the old
+    memory-mapped array. The new cache replaces the old one atomically.
+    """
+
+    start = time.perf_counter()
+    os.makedirs(cache_dir, exist_ok=True)
+
+    files = list_audio_files(dataset_path)
+    if not files:
+        print(f"No audio files in {dataset_path}")
+        return
+
+    old_index = load_index(cache_dir)
+    if old_index is not None and old_index.get("settings") != _settings():
+        print("Feature settings changed; rebuilding the whole cache")
+        old_index = None
+
+    old_entries = {e["path"]: e for e in old_index["entries"]} if old_index else {}
+    old_rows = {e["hash"]: e["row"] for e in old_entries.values()}
+    old_features = np.load(os.path.join(cache_dir, FEATURES_FILE), mmap_mode="r") if old_index else None
+
+    hashes = _hash_files(files, old_entries)
+    todo = [i for i, h in enumerate(hashes) if h not in old_rows]
+
+    height, width = MODEL_INPUT_SIZE[1], MODEL_INPUT_SIZE[0]
+    tmp_features = os.path.join(cache_dir, FEATURES_FILE + ".tmp")
+    features = np.lib.format.open_memmap(
+        tmp_features, mode="w+", dtype=np.float16, shape=(len(files), height, width)
+    )
+
+    for i, h in enumerate(hashes):
+        if h in old_rows:
+            features[i] = old_features[old_rows[h]]
+
+    print(f"{len(files)} files, {len(files) - len(todo)} cached, {len(todo)} to compute")
+
+    failed = set()
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paths = [files[i][0] for i in todo]
+            digests = [hashes[i] for i in todo]
+            results = pool.map(_compute_safe, paths, digests, chunksize=max(1, len(paths) // 64))
+            for i, result in zip(todo, results):
+                if result is None:
+                    failed.add(i)
+                else:
+                    features[i] = result
+
+    features.flush()
+    del features, old_features
+
+    keep = [i for i in range(len(files)) if i not in failed]
+    if failed:
+        # Drop rows of files that could not be decoded
+        full = np.load(tmp_features, mmap_mode="r")
+        compact = np.lib.format.open_memmap(
+            tmp_features + ".compact", mode="w+", dtype=np.float16, shape=(len(keep), height, width)
+        )
+        for row, i in enumerate(keep):
+            compact[row] = full[i]
+        compact.flush()
+        del full, compact
+        os.replace(tmp_features + ".compact", tmp_features)
+
+    entries = []
+    for row, i in enumerate(keep):
+        path, label = files[i]
+        st = os.stat(path)
+        entries.append({
+            "path": path,
+            "label": label,
+            "hash": hashes[i],
+            "row": row,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns
+        })
+
+    tmp_labels = os.path.join(cache_dir, LABELS_FILE + ".tmp")
+    with open(tmp_labels, "wb") as f:
+        np.save(f, np.array([e["label"] for e in entries], dtype=np.int64))
+
+    # Every file is swapped in complete and the index goes last;
+    # load_features refuses arrays that do not match the index
+    os.replace(tmp_features, os.path.join(cache_dir, FEATURES_FILE))
+    os.replace(tmp_labels, os.path.join(cache_dir, LABELS_FILE))
+
+    index = {"settings": _settings(), "classes": CLASSES, "entries": entries}
+    tmp_index = os.path.join(cache_dir, INDEX_FILE + ".tmp")
+    with open(tmp_index, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_index, os.path.join(cache_dir, INDEX_FILE))
+
+    elapsed = time.perf_counter() - start
+    print(f"Cached {len(entries)} clips ({len(failed)} failed) in {elapsed:.1f}s -> {cache_dir}")
+
+
+def _compute_safe(path, digest=None):
+    try:
+        return compute_features(path, digest)
+    except Exception as e:
+        print(f"{path}: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the mel feature cache used for training")
+    parser.add_argument("--dataset", default=AUDIO_DATASET_PATH, help="directory with one folder per class")
+    parser.add_argument("--cache", default=CACHE_DIR, help="output directory")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    build_cache(args.dataset, args.cache, args.workers)
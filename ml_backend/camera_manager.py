@@ -0,0 +1,332 @@
+import cv2
+import sys
+import time
+import threading
+from collections import deque
+from frame_skip import AdaptiveFrameSkip, LATENCY_BUDGET_MS
+
+# Frames kept per camera; when full the oldest frame is dropped so
+# workers always see recent footage
+FRAME_QUEUE_SIZE = 4
+
+# Number of YOLODetector instances shared by all cameras
+NUM_WORKERS = 2
+
+# Delay before reopening a source that stopped returning frames
+RECONNECT_DELAY = 2.0
+
+
+def parse_source(source):
+    """
+    Device indices are passed as integers to OpenCV,
+    everything else (RTSP URLs, video files) as strings.
+    """
+
+    if isinstance(source, int):
+        return source
+
+    source = str(source).strip()
+    return int(source) if source.isdigit() else source
+
+
+class CameraStream:
+    def __init__(self, camera_id, source, queue_size=FRAME_QUEUE_SIZE, motion_gate=False,
+                 latency_budget_ms=LATENCY_BUDGET_MS, zones=False):
+        self.camera_id = camera_id
+        self.source = parse_source(source)
+        self.frames = deque(maxlen=queue_size)
+        self.dropped = 0
+        self.captured = 0
+        self.static = 0
+        self.skipped = 0
+        self.motion_gate = None
+        self.frame_skip = AdaptiveFrameSkip(latency_budget_ms=latency_budget_ms)
+
+        # Zone rules of this camera, compiled for the frame size on the
+        # first frame when zones is set
+        self.zones = zones
+        self.rules = None
+
+        if motion_gate:
+            from motion_detect import MotionGate
+            self.motion_gate = MotionGate()
+        self.running = False
+        self._lock = threading.Lock()
+        self._thread = None
+        self._on_frame = None
+
+    def start(self, on_frame=None):
+        self._on_frame = on_frame
+        self.running = True
+        self._thread = threading.Thread(
+            target=self._capture_loop,
+            name=f"capture-{self.camera_id}",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _capture_loop(self):
+        is_file = isinstance(self.source, str) and "://" not in self.source
+
+        while self.running:
+            cap = cv2.VideoCapture(self.source)
+
+            if not cap.isOpened():
+                print(f"[{self.camera_id}] Could not open source {self.source}")
+                time.sleep(RECONNECT_DELAY)
+                continue
+
+            # Files are read at their own frame rate like a live feed;
+            # decoding them flat out would only fill the drop-oldest queue
+            fps = cap.get(cv2.CAP_PROP_FPS) if is_file else 0
+            interval = 1.0 / fps if fps and fps > 0 else 0.0
+            next_frame = time.monotonic()
+
+            while self.running:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self.push(frame)
+
+                if interval:
+                    next_frame += interval
+                    delay = next_frame - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+            cap.release()
+
+            # Video files end, live sources get reopened
+            if is_file:
+                print(f"[{self.camera_id}] End of file {self.source}")
+                self.running = False
+            elif self.running:
+                print(f"[{self.camera_id}] Stream lost, reconnecting...")
+                time.sleep(RECONNECT_DELAY)
+
+    def push(self, frame):
+        captured_at = time.time()
+        offset = (0, 0)
+
+        if not self.frame_skip.tick():
+            self.skipped += 1
+            return
+
+        # Only the zones are inferred
+        if self.zones:
+            if self.rules is None:
+                from zones import compile_rules
+                self.rules = compile_rules(self.source, frame.shape)
+            frame, offset = self.rules.crop(frame)
+
+        # Static frames never reach the inference queue
+        if self.motion_gate is not None:
+            frame, motion_offset = self.motion_gate.gate(frame)
+            if frame is None:
+                self.static += 1
+                self.frame_skip.update(queue_depth=self.depth())
+                return
+            offset = (offset[0] + motion_offset[0], offset[1] + motion_offset[1])
+
+        with self._lock:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append((captured_at, frame, offset))
+            self.captured += 1
+
+        if self._on_frame is not None:
+            self._on_frame(self)
+
+    def pop(self):
+        with self._lock:
+            if not self.frames:
+                return None
+            return self.frames.popleft()
+
+    def depth(self):
+        with self._lock:
+            return len(self.frames)
+
+
+class CameraManager:
+    """
+    Runs one capture thread per source and a shared pool of
+    YOLODetector workers. Workers take frames from the cameras in
+    round-robin order so a busy feed cannot starve the others.
+    """
+
+    def __init__(self, sources, num_workers=NUM_WORKERS, model_path=None,
+                 on_result=None, queue_size=FRAME_QUEUE_SIZE, motion_gate=False,
+                 latency_budget_ms=LATENCY_BUDGET_MS, annotate=False, zones=False):
+        """
+        latency_budget_ms is either one value for all cameras or a list
+        with one budget per source.
+
+        With zones, each camera only infers the region covered by its
+        zone rules (CameraStream.rules).
+
+        annotate may be a bool or a callable returning one; results are
+        only plotted while it is true (e.g. a preview client is
+        connected), otherwise on_result gets None for the frame.
+        """
+
+        if not isinstance(latency_budget_ms, (list, tuple)):
+            latency_budget_ms = [latency_budget_ms] * len(sources)
+
+        self.cameras = [
+            CameraStream(f"cam{i}", src, queue_size=queue_size, motion_gate=motion_gate,
+                         latency_budget_ms=budget, zones=zones)
+            for i, (src, budget) in enumerate(zip(sources, latency_budget_ms))
+        ]
+        self.num_workers = num_workers
+        self.model_path = model_path
+        self.on_result = on_result
+        self.annotate = annotate
+        self.running = False
+
+        self._cond = threading.Condition()
+        self._next_camera = 0
+        self._busy = set()
+        self._workers = []
+
+    def start(self):
+        self.running = True
+
+        for cam in self.cameras:
+            cam.start(on_frame=self._frame_ready)
+
+        for i in range(self.num_workers):
+            t = threading.Thread(target=self._worker_loop, name=f"yolo-worker-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def stop(self):
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+
+        for cam in self.cameras:
+            cam.stop()
+        for t in self._workers:
+            t.join(timeout=5)
+
+    def camera(self, camera_id):
+        return next(cam for cam in self.cameras if cam.camera_id == camera_id)
+
+    def _frame_ready(self, cam):
+        with self._cond:
+            self._cond.notify()
+
+    def _next_job(self):
+        """
+        Pick the next camera with a pending frame, starting after the
+        camera served last. A camera is handed to one worker at a time
+        so its frames stay in order.
+        """
+
+        n = len(self.cameras)
+        for offset in range(n):
+            idx = (self._next_camera + offset) % n
+            cam = self.cameras[idx]
+            if cam.camera_id in self._busy:
+                continue
+
+            item = cam.pop()
+            if item is None:
+                continue
+
+            self._next_camera = (idx + 1) % n
+            self._busy.add(cam.camera_id)
+            return cam, item
+
+        return None
+
+    def _worker_loop(self):
+        # Imported here so capture-only users of this module
+        # (parse_source, CameraStream) do not pull in ultralytics
+        from models.yolo_model import YOLODetector
+        from motion_detect import shift_bbox
+        from inference_backend import yolo_model_path
+
+        detector = YOLODetector(self.model_path or yolo_model_path())
+
+        while self.running:
+            with self._cond:
+                job = self._next_job()
+                while job is None and self.running:
+                    self._cond.wait(timeout=0.5)
+                    job = self._next_job()
+
+            if job is None:
+                break
+
+            cam, (captured_at, frame, offset) = job
+            try:
+                annotate = self.annotate() if callable(self.annotate) else self.annotate
+                # Per-box detections, so the tracker can tell objects apart
+                annotated_frame, per_frame = detector.detect_frames(frame, annotate=annotate)
+                detections = per_frame[0]
+                for d in detections:
+                    d["bbox"] = shift_bbox(d["bbox"], offset)
+
+                # Pure inference time; the backlog is accounted for by
+                # queue_depth, so queueing delay is not counted twice
+                cam.frame_skip.update(
+                    detector.last_latency_ms,
+                    queue_depth=cam.depth(),
+                    labels=[d["label"] for d in detections]
+                )
+                if self.on_result is not None:
+                    self.on_result(cam.camera_id, captured_at, annotated_frame, detections)
+            except Exception as e:
+                print(f"[{cam.camera_id}] Inference failed:", e)
+            finally:
+                with self._cond:
+                    self._busy.discard(cam.camera_id)
+                    self._cond.notify()
+
+    def stats(self):
+        return {
+            cam.camera_id: {
+                "source": cam.source,
+                "captured": cam.captured,
+                "dropped": cam.dropped,
+                "static": cam.static,
+                "skipped": cam.skipped,
+                "frame_skip": cam.frame_skip.stats(),
+                "queued": cam.depth(),
+                "running": cam.running
+            }
+            for cam in self.cameras
+        }
+
+
+def main(sources, motion_gate=True):
+    def print_result(camera_id, captured_at, annotated_frame, detections):
+        labels = ", ".join(f"{d['label']} ({d['confidence']:.2f})" for d in detections)
+        lag = time.time() - captured_at
+        print(f"[{camera_id}] {labels or 'no detections'} (lag {lag * 1000:.0f} ms)")
+
+    manager = CameraManager(sources, on_result=print_result, motion_gate=motion_gate)
+    manager.start()
+    print(f"Monitoring {len(sources)} camera(s). Press CTRL+C to stop.")
+
+    try:
+        while any(cam.running for cam in manager.cameras):
+            time.sleep(5)
+            for camera_id, s in manager.stats().items():
+                print(f"[{camera_id}] captured={s['captured']} static={s['static']} "
+                      f"dropped={s['dropped']} queued={s['queued']} skip={s['frame_skip']['skip']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manager.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or [0])
@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Hashable, Optional
+
+
+class ConfirmationRule:
+    """
+    M-of-N rule: an event is confirmed once at least min_count of the
+    last window_size detections, all within window_seconds, reached
+    min_confidence.
+    """
+
+    def __init__(self, min_count: int = 3, window_size: int = 5,
+                 window_seconds: float = 5.0, min_confidence: float = 0.6):
+        if not 1 <= min_count <= window_size:
+            raise ValueError("min_count must be between 1 and window_size")
+        self.min_count = min_count
+        self.window_size = window_size
+        self.window_seconds = window_seconds
+        self.min_confidence = min_confidence
+
+    def __repr__(self):
+        return (
+            f"ConfirmationRule({self.min_count} of {self.window_size} "
+            f"in {self.window_seconds}s, conf >= {self.min_confidence})"
+        )
+
+
+class _History:
+    __slots__ = ("samples", "hits", "last_seen")
+
+    def __init__(self):
+        # (timestamp, passed) pairs, oldest first
+        self.samples = deque()
+        self.hits = 0
+        self.last_seen = 0.0
+
+    def pop_oldest(self):
+        _, passed = self.samples.popleft()
+        self.hits -= passed
+
+
+class ConfirmationEngine:
+    """
+    Temporal confirmation keyed by (source, event_type).
+
+    Each key keeps its own short history, so detections from different
+    cameras and microphones never count towards each other. Samples
+    older than the rule's window are dropped as new ones arrive, and
+    the history is cleared once an event is confirmed, so one incident
+    confirms once and a new incident has to build up again.
+
+    Every update is O(1) amortized: each sample is appended and removed
+    once, and the hit count is kept alongside the deque. Keys live in
+    an OrderedDict in least-recently-seen order; keys idle for longer
+    than idle_ttl, or beyond max_keys, are evicted from the front.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, ConfirmationRule]] = None,
+                 default_rule: Optional[ConfirmationRule] = None,
+                 max_keys: int = 10000, idle_ttl: float = 300.0):
+        self.rules = dict(rules or {})
+        self.default_rule = default_rule or ConfirmationRule()
+        self.max_keys = max_keys
+        self.idle_ttl = idle_ttl
+
+        self._histories: "OrderedDict[Hashable, _History]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.confirmed = 0
+        self.evicted = 0
+
+    def rule_for(self, event_type: str) -> ConfirmationRule:
+        return self.rules.get(event_type, self.default_rule)
+
+    def update(self, source: str, event_type: str, confidence: float,
+               now: Optional[float] = None) -> bool:
+        """
+        Record one detection; True when it confirms the event.
+        """
+
+        now = time.monotonic() if now is None else now
+        rule = self.rule_for(event_type)
+        key = (source, event_type)
+        passed = confidence >= rule.min_confidence
+
+        with self._lock:
+            history = self._histories.get(key)
+            if history is None:
+                history = self._histories[key] = _History()
+            else:
+                self._histories.move_to_end(key)
+            history.last_seen = now
+
+            samples = history.samples
+            cutoff = now - rule.window_seconds
+            while samples and samples[0][0] < cutoff:
+                history.pop_oldest()
+            if len(samples) >= rule.window_size:
+                history.pop_oldest()
+
+            samples.append((now, passed))
+            history.hits += passed
+
+            confirmed = passed and history.hits >= rule.min_count
+            if confirmed:
+                samples.clear()
+                history.hits = 0
+                self.confirmed += 1
+
+            self._evict(now)
+
+        return confirmed
+
+    def _evict(self, now: float):
+        cutoff = now - self.idle_ttl
+        histories = self._histories
+        while histories:
+            oldest = next(iter(histories.values()))
+            if len(histories) <= self.max_keys and oldest.last_seen >= cutoff:
+                break
+            histories.popitem(last=False)
+            self.evicted += 1
+
+    def reset(self, source: Optional[str] = None):
+        with self._lock:
+            if source is None:
+                self._histories.clear()
+            else:
+                for key in [k for k in self._histories if k[0] == source]:
+                    del self._histories[key]
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._histories),
+            "confirmed": self.confirmed,
+            "evicted": self.evicted
+        }
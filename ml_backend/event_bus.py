@@ -0,0 +1,51 @@
+import threading
+from typing import Callable, Dict
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for confirmed events.
+
+    publish() runs every subscriber inline on the caller's thread, so
+    subscribers must only hand the event off (enqueue, schedule on an
+    event loop) and never block. A failing subscriber does not affect
+    the others.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, Callable[[dict], None]] = {}
+        self._next_token = 0
+        self._lock = threading.Lock()
+
+        self.published = 0
+
+    def subscribe(self, callback: Callable[[dict], None]) -> int:
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subscribers[token] = callback
+            return token
+
+    def unsubscribe(self, token: int):
+        with self._lock:
+            self._subscribers.pop(token, None)
+
+    def publish(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+
+        self.published += 1
+
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print("Event subscriber failed:", e)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+# Process-wide bus: event_manager publishes, backend_server subscribes
+bus = EventBus()
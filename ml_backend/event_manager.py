@@ -1,15 +1,15 @@
-import sqlite3
 import json
 import os
 from datetime import datetime
-from threading import Thread
 from typing import Optional
-from collections import defaultdict, deque
 
-try:
-    from twilio.rest import Client
-except Exception:
-    Client = None
+from db.storage import SQLiteStore
+
+from .event_bus import bus
+from .confirmation import ConfirmationEngine, ConfirmationRule
+from notifications import create_notifier, NOTIFY_PROVIDER
+
+from .notification_dispatcher import NotificationDispatcher
 
 
 # =========================
@@ -30,23 +30,39 @@ os.makedirs(os.path.join(os.path.dirname(__file__), "..", "db"), exist_ok=True)
 # IEEE PAPER INSPIRED CONFIG
 # =========================
 
-# Temporal window for confirming suspicious events
+# Temporal window for confirming suspicious events: at least
+# EVENT_CONFIRMATION_THRESHOLD of the last EVENT_HISTORY_WINDOW
+# detections from one source within EVENT_WINDOW_SECONDS
 EVENT_HISTORY_WINDOW = 5
 EVENT_CONFIRMATION_THRESHOLD = 3
+EVENT_WINDOW_SECONDS = 5.0
 MIN_CONFIDENCE_THRESHOLD = 0.6
 
-# Store recent detections for temporal consistency
-_event_history = defaultdict(lambda: deque(maxlen=EVENT_HISTORY_WINDOW))
+# Weapons and short sounds confirm faster than the default
+CONFIRMATION_RULES = {
+    "knife": ConfirmationRule(min_count=2, window_size=3, window_seconds=3.0),
+    "gun": ConfirmationRule(min_count=2, window_size=3, window_seconds=3.0),
+    "glass_break": ConfirmationRule(min_count=2, window_size=4, window_seconds=2.0)
+}
+
+# Recent detections per (source, event_type) for temporal consistency
+confirmation = ConfirmationEngine(
+    rules=CONFIRMATION_RULES,
+    default_rule=ConfirmationRule(
+        min_count=EVENT_CONFIRMATION_THRESHOLD,
+        window_size=EVENT_HISTORY_WINDOW,
+        window_seconds=EVENT_WINDOW_SECONDS,
+        min_confidence=MIN_CONFIDENCE_THRESHOLD
+    )
+)
 
 
 # =========================
 # DATABASE SETUP
 # =========================
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
+SCHEMA = [
+    """
     CREATE TABLE IF NOT EXISTS events (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         timestamp TEXT,
@@ -55,29 +71,105 @@ def init_db():
         confidence REAL,
         meta TEXT
     )
-    """)
-    conn.commit()
-    conn.close()
+    """
+]
+
+INSERT_EVENT = (
+    "INSERT INTO events (timestamp, source, event_type, confidence, meta) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+SELECT_LATEST_EVENTS = (
+    "SELECT id, timestamp, source, event_type, confidence, meta "
+    "FROM events ORDER BY id DESC LIMIT ?"
+)
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_events_type ON events (event_type)",
+    "CREATE INDEX IF NOT EXISTS idx_events_source ON events (source)"
+]
+
+MAX_PAGE_SIZE = 1000
+
+# Pooled per-thread WAL connections shared with backend_server
+store = SQLiteStore(DB_PATH, schema=SCHEMA, indexes=INDEXES)
+
+
+def init_db():
+    """
+    Create the schema; runs once per process.
+    """
+
+    store.init_schema()
+
+
+def row_to_event(row) -> dict:
+    return {
+        "id": row[0],
+        "timestamp": row[1],
+        "source": row[2],
+        "event_type": row[3],
+        "confidence": row[4],
+        "meta": json.loads(row[5] or "{}")
+    }
+
+
+def get_latest_events(limit: int) -> list:
+    return [row_to_event(r) for r in store.query(SELECT_LATEST_EVENTS, (limit,))]
+
+
+def query_events(
+    cursor: Optional[int] = None,
+    limit: int = 100,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    source: Optional[str] = None,
+    event_type: Optional[str] = None,
+    min_confidence: Optional[float] = None
+) -> tuple:
+    """
+    Keyset-paginated, filtered page of events, newest first.
+    since/until use the stored "%Y-%m-%d %H:%M:%S" UTC format.
+    Returns (events, next_cursor).
+    """
+
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    filters = [
+        ("id < ?", cursor),
+        ("timestamp >= ?", since),
+        ("timestamp <= ?", until),
+        ("source = ?", source),
+        ("event_type = ?", event_type),
+        ("confidence >= ?", min_confidence)
+    ]
+    clauses = [clause for clause, value in filters if value is not None]
+    params = [value for _, value in filters if value is not None]
+
+    sql = "SELECT id, timestamp, source, event_type, confidence, meta FROM events"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY id DESC LIMIT ?"
+
+    events = [row_to_event(r) for r in store.query(sql, (*params, limit))]
+    next_cursor = events[-1]["id"] if len(events) == limit else None
+
+    return events, next_cursor
 
 
 # =========================
 # IEEE PAPER INSPIRED LOGIC
 # =========================
 
-def _should_confirm_event(event_type: str, confidence: float) -> bool:
+def _should_confirm_event(source: str, event_type: str, confidence: float) -> bool:
     """
     IEEE paper inspired change:
     Confirm events only if they persist across multiple detections
-    with sufficient confidence (temporal consistency).
+    from the same source with sufficient confidence (temporal consistency).
     """
 
-    if confidence < MIN_CONFIDENCE_THRESHOLD:
-        return False
-
-    history = _event_history[event_type]
-    history.append(confidence)
-
-    return len(history) >= EVENT_CONFIRMATION_THRESHOLD
+    return confirmation.update(source, event_type, confidence)
 
 
 # =========================
@@ -97,7 +189,7 @@ def log_event(
 
     # IEEE paper inspired change:
     # Apply temporal consistency + confidence filtering before logging
-    if not _should_confirm_event(event_type, confidence):
+    if not _should_confirm_event(source, event_type, confidence):
         return {
             "status": "ignored",
             "reason": "Low confidence or insufficient temporal consistency",
@@ -105,23 +197,14 @@ def log_event(
             "confidence": confidence
         }
 
-    init_db()
-
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
     ts = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
     meta_json = json.dumps(meta or {})
 
-    cur.execute(
-        "INSERT INTO events (timestamp, source, event_type, confidence, meta) "
-        "VALUES (?, ?, ?, ?, ?)",
+    cur = store.execute(
+        INSERT_EVENT,
         (ts, source, event_type, float(confidence), meta_json)
     )
-
     event_id = cur.lastrowid
-    conn.commit()
-    conn.close()
 
     event = {
         "id": event_id,
@@ -132,8 +215,11 @@ def log_event(
         "meta": meta or {}
     }
 
-    # Notify asynchronously
-    Thread(target=_maybe_notify_contacts, args=(event,), daemon=True).start()
+    # Push to live dashboards (non-blocking hand-off)
+    bus.publish(event)
+
+    # Notify asynchronously on the shared worker pool
+    _maybe_notify_contacts(event)
 
     return event
 
@@ -157,25 +243,24 @@ def _maybe_notify_contacts(event: dict):
         send_sms_and_whatsapp(event)
 
 
-def send_sms_and_whatsapp(event: dict):
-    """
-    Send SMS and WhatsApp alerts using Twilio.
-    """
+# One pool and one cached client for every event; repeated detections
+# of the same label from the same source are sent once per cooldown.
+# Falls back to the stub notifier when Twilio is not configured.
+dispatcher = NotificationDispatcher(create_notifier(
+    NOTIFY_PROVIDER, TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_SMS_FROM, TWILIO_WA_FROM
+))
 
-    if Client is None:
-        print("Twilio client not installed. Skipping notifications.")
-        return
 
-    if not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN:
-        print("Twilio credentials not set. Skipping notifications.")
-        return
+def send_sms_and_whatsapp(event: dict) -> bool:
+    """
+    Queue SMS (and WhatsApp, if configured) alerts to every contact.
+    Returns False when nothing was queued.
+    """
 
     contacts = [c.strip() for c in EMERGENCY_CONTACTS.split(",") if c.strip()]
     if not contacts:
         print("No emergency contacts configured.")
-        return
-
-    client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        return False
 
     text = (
         f"🚨 ALERT: {event['event_type']} detected\n"
@@ -184,25 +269,9 @@ def send_sms_and_whatsapp(event: dict):
         f"Time (UTC): {event['timestamp']}"
     )
 
-    for contact in contacts:
-        try:
-            client.messages.create(
-                body=text,
-                from_=TWILIO_SMS_FROM,
-                to=contact
-            )
-            print(f"SMS sent to {contact}")
-        except Exception as e:
-            print("Failed to send SMS:", e)
-
-        if TWILIO_WA_FROM:
-            wa_to = contact if contact.startswith("whatsapp:") else f"whatsapp:{contact}"
-            try:
-                client.messages.create(
-                    body=text,
-                    from_=TWILIO_WA_FROM,
-                    to=wa_to
-                )
-                print(f"WhatsApp sent to {contact}")
-            except Exception as e:
-                print("Failed to send WhatsApp:", e)
+    recipients = [(contact, "sms") for contact in contacts]
+    if TWILIO_WA_FROM:
+        recipients += [(contact, "whatsapp") for contact in contacts]
+
+    key = (event["source"], event["event_type"])
+    return dispatcher.notify(key, text, recipients)
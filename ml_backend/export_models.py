@@ -0,0 +1,70 @@
+import argparse
+import shutil
+
+import tensorflow as tf
+
+from inference_backend import (
+    AUDIO_MODEL_PATH, AUDIO_ONNX_PATH, AUDIO_ONNX_INT8_PATH,
+    YOLO_PATH, YOLO_ONNX_PATH, YOLO_ONNX_INT8_PATH,
+    single_channel_model
+)
+
+ONNX_OPSET = 17
+YOLO_IMGSZ = 640
+
+
+def quantize_int8(src, dst):
+    """
+    Dynamic int8 quantization (weights int8, activations quantized at
+    runtime), which needs no calibration data.
+    """
+
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+    print(f"Saved {dst}")
+
+
+def export_audio_model(int8=False):
+    import tf2onnx
+
+    model = tf.keras.models.load_model(AUDIO_MODEL_PATH)
+
+    # Export the folded single-channel model so ONNX callers feed
+    # (batch, 128, 128, 1) like the Keras backend
+    mono = single_channel_model(model) or model
+    channels = mono.input_shape[-1]
+
+    spec = (tf.TensorSpec((None, 128, 128, channels), tf.float32, name="mel"),)
+    tf2onnx.convert.from_keras(mono, input_signature=spec, opset=ONNX_OPSET, output_path=AUDIO_ONNX_PATH)
+    print(f"Saved {AUDIO_ONNX_PATH}")
+
+    if int8:
+        quantize_int8(AUDIO_ONNX_PATH, AUDIO_ONNX_INT8_PATH)
+
+
+def export_yolo_model(int8=False):
+    from ultralytics import YOLO
+
+    model = YOLO(YOLO_PATH)
+
+    # Dynamic axes so whole frame sequences can be sent as one batch
+    exported = model.export(format="onnx", imgsz=YOLO_IMGSZ, dynamic=True, simplify=True, opset=ONNX_OPSET)
+    if exported != YOLO_ONNX_PATH:
+        shutil.move(exported, YOLO_ONNX_PATH)
+    print(f"Saved {YOLO_ONNX_PATH}")
+
+    if int8:
+        quantize_int8(YOLO_ONNX_PATH, YOLO_ONNX_INT8_PATH)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the audio CNN and YOLO to ONNX")
+    parser.add_argument("--int8", action="store_true", help="also write int8-quantized models")
+    parser.add_argument("--only", choices=["audio", "yolo"], help="export a single model")
+    args = parser.parse_args()
+
+    if args.only in (None, "audio"):
+        export_audio_model(args.int8)
+    if args.only in (None, "yolo"):
+        export_yolo_model(args.int8)
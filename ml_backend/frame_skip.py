@@ -0,0 +1,115 @@
+import math
+import time
+import threading
+
+# Starting skip rate (same as the old fixed FRAME_SKIP)
+DEFAULT_SKIP = 4
+MIN_SKIP = 1
+MAX_SKIP = 30
+
+# End-to-end latency we allow per camera, from capture to detection result
+LATENCY_BUDGET_MS = 500
+
+# Labels that make a scene "active" and speed up sampling
+ACTIVE_LABELS = ("person", "knife", "scissors", "gun")
+
+# Inferences without active labels before sampling slows down
+IDLE_AFTER = 10
+
+# Smoothing factor for latency / frame interval averages
+EMA_ALPHA = 0.2
+
+
+class AdaptiveFrameSkip:
+    """
+    Replaces a fixed FRAME_SKIP. tick() is called for every captured
+    frame and says whether it should be processed; update() is called
+    after every inference with the measured latency, the current
+    queue depth and the detected labels.
+
+    - never samples faster than inference can keep up with
+    - backs off when latency (including queued work) exceeds the budget
+    - samples as fast as possible while weapons / people are in view
+    - slows down step by step when the scene stays idle
+    """
+
+    def __init__(self, initial_skip=DEFAULT_SKIP, min_skip=MIN_SKIP, max_skip=MAX_SKIP,
+                 latency_budget_ms=LATENCY_BUDGET_MS, active_labels=ACTIVE_LABELS,
+                 idle_after=IDLE_AFTER):
+        self.skip = initial_skip
+        self.min_skip = min_skip
+        self.max_skip = max_skip
+        self.latency_budget_ms = latency_budget_ms
+        self.active_labels = set(active_labels)
+        self.idle_after = idle_after
+
+        self.latency_ms = None
+        self.frame_interval_ms = None
+        self.idle_streak = 0
+
+        self._count = 0
+        self._last_tick = None
+        self._lock = threading.Lock()
+
+    def _ema(self, current, value):
+        if current is None:
+            return value
+        return (1 - EMA_ALPHA) * current + EMA_ALPHA * value
+
+    def tick(self):
+        now = time.perf_counter()
+
+        with self._lock:
+            if self._last_tick is not None:
+                interval = (now - self._last_tick) * 1000
+                self.frame_interval_ms = self._ema(self.frame_interval_ms, interval)
+            self._last_tick = now
+
+            self._count += 1
+            if self._count >= self.skip:
+                self._count = 0
+                return True
+            return False
+
+    def _min_feasible_skip(self):
+        # Processing every k-th frame must not take longer than k frames arrive
+        if not self.latency_ms or not self.frame_interval_ms:
+            return self.min_skip
+        return max(self.min_skip, math.ceil(self.latency_ms / self.frame_interval_ms))
+
+    def _max_budget_skip(self):
+        # The gap between sampled frames also adds to alert latency
+        if not self.frame_interval_ms:
+            return self.max_skip
+        return max(self.min_skip, min(self.max_skip, int(self.latency_budget_ms / self.frame_interval_ms)))
+
+    def update(self, latency_ms=None, queue_depth=0, labels=()):
+        with self._lock:
+            if latency_ms is not None:
+                self.latency_ms = self._ema(self.latency_ms, latency_ms)
+
+            active = any(label in self.active_labels for label in labels)
+            self.idle_streak = 0 if active else self.idle_streak + 1
+
+            floor = self._min_feasible_skip()
+            expected_ms = (self.latency_ms or 0) * (1 + queue_depth)
+
+            if expected_ms > self.latency_budget_ms:
+                skip = self.skip + 1
+            elif active:
+                skip = floor
+            elif self.idle_streak >= self.idle_after:
+                skip = min(self.skip + 1, self._max_budget_skip())
+            else:
+                skip = self.skip
+
+            self.skip = min(self.max_skip, max(floor, skip))
+            return self.skip
+
+    def stats(self):
+        return {
+            "skip": self.skip,
+            "latency_ms": round(self.latency_ms or 0, 1),
+            "frame_interval_ms": round(self.frame_interval_ms or 0, 1),
+            "idle_streak": self.idle_streak
+        }
@@ -2,7 +2,8 @@ import os
 import librosa
 import librosa.display
 import matplotlib.pyplot as plt
-import numpy as np
+
+from audio_cache import load_mel
 
 AUDIO_DATASET_PATH = "audio_dataset"
 SPEC_DATASET_PATH = "spectrogram_dataset"
@@ -13,9 +14,8 @@ for c in CLASSES:
     os.makedirs(os.path.join(SPEC_DATASET_PATH, c), exist_ok=True)
 
 def create_spectrogram(audio_file, save_path):
-    y, sr = librosa.load(audio_file, sr=22050)
-    mel = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=128)
-    mel_db = librosa.power_to_db(mel, ref=np.max)
+    sr = 22050
+    mel_db = load_mel(audio_file, sr=sr, n_mels=128)
 
     plt.figure(figsize=(3, 3))
     plt.axis("off")
@@ -0,0 +1,179 @@
+import os
+import time
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# "native" runs the original frameworks (TensorFlow / ultralytics PyTorch),
+# "onnx" runs the exported models through onnxruntime on CPU
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "native")
+
+# Use the int8-quantized ONNX exports when available
+ONNX_INT8 = os.getenv("ONNX_INT8", "0") == "1"
+
+AUDIO_MODEL_PATH = os.path.join(BASE_DIR, "audio_model.h5")
+AUDIO_ONNX_PATH = os.path.join(BASE_DIR, "audio_model.onnx")
+AUDIO_ONNX_INT8_PATH = os.path.join(BASE_DIR, "audio_model_int8.onnx")
+
+YOLO_PATH = os.path.join(BASE_DIR, "yolov8n.pt")
+YOLO_ONNX_PATH = os.path.join(BASE_DIR, "yolov8n.onnx")
+YOLO_ONNX_INT8_PATH = os.path.join(BASE_DIR, "yolov8n_int8.onnx")
+
+# 0 lets onnxruntime pick the number of cores
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+
+
+def single_channel_model(model):
+    """
+    The audio CNN was trained on 3 identical channels. Because the
+    channels are equal, the first Conv2D gives the same output when its
+    kernel is summed over the input-channel axis and fed one channel,
+    so the np.repeat copy can be dropped entirely.
+
+    Returns None when the model does not start with a 3-channel Conv2D.
+    """
+
+    import tensorflow as tf
+
+    first = model.layers[0]
+    if not isinstance(first, tf.keras.layers.Conv2D) or model.input_shape[-1] != 3:
+        return None
+
+    kernel, *rest = first.get_weights()
+
+    config = first.get_config()
+    config["name"] = f"{first.name}_mono"
+    config.pop("batch_input_shape", None)
+    config.pop("input_shape", None)
+    conv = tf.keras.layers.Conv2D.from_config(config)
+
+    inputs = tf.keras.Input(shape=(*model.input_shape[1:3], 1))
+    x = conv(inputs)
+    conv.set_weights([kernel.sum(axis=2, keepdims=True), *rest])
+
+    for layer in model.layers[1:]:
+        x = layer(x)
+
+    return tf.keras.Model(inputs, x)
+
+
+class AudioBackend:
+    """
+    Common interface for the audio classifier backends.
+    predict_batch takes a float32 array of shape (batch, 128, 128, 1)
+    and returns class probabilities of shape (batch, n_classes).
+    """
+
+    name = "base"
+
+    def predict_batch(self, x):
+        raise NotImplementedError
+
+
+class KerasAudioBackend(AudioBackend):
+    name = "keras"
+
+    def __init__(self, model_path=AUDIO_MODEL_PATH, model=None):
+        import tensorflow as tf
+
+        if model is None:
+            model = tf.keras.models.load_model(model_path)
+
+        mono = single_channel_model(model)
+        self.model = mono if mono is not None else model
+        self.channels = 1 if mono is not None else model.input_shape[-1]
+
+        height, width = self.model.input_shape[1:3]
+        self._forward = tf.function(
+            self._call_model,
+            input_signature=[tf.TensorSpec((None, height, width, 1), tf.float32)]
+        )
+
+    def _call_model(self, x):
+        import tensorflow as tf
+
+        # Fallback for models that cannot be folded to one channel;
+        # the broadcast happens inside the graph, not in NumPy
+        if self.channels != 1:
+            x = tf.repeat(x, self.channels, axis=-1)
+        return self.model(x, training=False)
+
+    def predict_batch(self, x):
+        return self._forward(x).numpy()
+
+
+class OnnxAudioBackend(AudioBackend):
+    name = "onnx"
+
+    def __init__(self, model_path=AUDIO_ONNX_PATH, threads=ONNX_THREADS):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError("onnxruntime is not installed (pip install onnxruntime)")
+
+        if not os.path.exists(model_path):
+            raise RuntimeError(f"{model_path} not found, run export_models.py first")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict_batch(self, x):
+        return self.session.run(None, {self.input_name: np.ascontiguousarray(x, dtype=np.float32)})[0]
+
+
+def load_audio_backend(backend=None, int8=None):
+    backend = backend or INFERENCE_BACKEND
+    int8 = ONNX_INT8 if int8 is None else int8
+
+    if backend == "onnx":
+        return OnnxAudioBackend(AUDIO_ONNX_INT8_PATH if int8 else AUDIO_ONNX_PATH)
+    if backend == "native":
+        return KerasAudioBackend()
+
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+
+def yolo_model_path(backend=None, int8=None):
+    """
+    ultralytics runs .onnx weights through onnxruntime itself, so
+    switching YOLO backends only means picking the exported file.
+    """
+
+    backend = backend or INFERENCE_BACKEND
+    int8 = ONNX_INT8 if int8 is None else int8
+
+    if backend == "onnx":
+        path = YOLO_ONNX_INT8_PATH if int8 else YOLO_ONNX_PATH
+        if not os.path.exists(path):
+            raise RuntimeError(f"{path} not found, run export_models.py first")
+        return path
+    if backend == "native":
+        return YOLO_PATH
+
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+
+def time_call(fn, *args, repeats=20, warmup=3):
+    """
+    Median latency of fn(*args) in milliseconds.
+    """
+
+    for _ in range(warmup):
+        fn(*args)
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return float(np.median(timings))
@@ -1,134 +1,286 @@
 import cv2
-import numpy as np
-import sounddevice as sd
-import librosa
-import tensorflow as tf
+import argparse
 import threading
 import time
-import requests
 import os
+import model_registry
+from camera_manager import parse_source
+from alert_publisher import AlertPublisher
+from preview import Preview, HEADLESS, PREVIEW_PORT
+
+# Models and their frameworks (TensorFlow, ultralytics/PyTorch,
+# librosa, sounddevice) are only imported by the loop that needs them,
+# so "--mode audio" never imports PyTorch and "--mode video" never
+# imports TensorFlow.
 
 API_URL = "http://127.0.0.1:8000"
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-print("Loading YOLO model...")
-from ultralytics import YOLO
-YOLO_PATH = os.path.join(BASE_DIR, "yolov8n.pt")
-yolo_model = YOLO(YOLO_PATH)
-
-print("Loading AUDIO model...")
-AUDIO_MODEL_PATH = os.path.join(BASE_DIR, "audio_model.h5")
-audio_model = tf.keras.models.load_model(AUDIO_MODEL_PATH)
+# Alerts are queued and sent in the background so a slow or
+# unreachable API never stalls detection
+publisher = AlertPublisher(API_URL)
 
 CLASSES = ["scream", "glass_break", "alarm", "normal"]
 SAMPLE_RATE = 22050
 AUDIO_DURATION = 2
+AUDIO_HOP = 0.25
 AUDIO_THRESHOLD = 0.60
 FRAME_SKIP = 4
+VIDEO_LATENCY_BUDGET_MS = 500
+
+# Comma-separated sounddevice input devices, e.g. "1,2" (default device if empty)
+AUDIO_DEVICES = [d.strip() for d in os.getenv("AUDIO_DEVICES", "").split(",") if d.strip()]
+
+def _load_audio_service():
+    from audio_inference import AudioInferenceService
+
+    # One batched inference service shared by all microphones
+    return AudioInferenceService(model_registry.get("audio"), CLASSES).start()
+
+model_registry.register("audio_service", _load_audio_service)
 
 def predict_audio(audio):
-    mel = librosa.feature.melspectrogram(
-        y=audio, sr=SAMPLE_RATE, n_mels=128
-    )
-    mel_db = librosa.power_to_db(mel, ref=np.max)
+    from mel_features import compute_mel_db, to_model_input
 
-    mel_db = cv2.resize(mel_db, (128, 128))
-    mel_db = np.expand_dims(mel_db, axis=-1)
-    mel_db = np.repeat(mel_db, 3, axis=-1)
-    mel_db = np.expand_dims(mel_db, axis=0)
+    mel_db = compute_mel_db(audio, sr=SAMPLE_RATE)
+    return predict_mel(to_model_input(mel_db))
 
-    preds = audio_model.predict(mel_db, verbose=0)
-    idx = np.argmax(preds)
-    confidence = float(preds[0][idx])
+def predict_mel(mel_db, mic_id="mic0"):
+    # Batched with windows from the other microphones
+    return model_registry.get("audio_service").submit(mic_id, mel_db).result()
 
-    return CLASSES[idx], confidence
+def audio_loop(device=None, mic_id="mic0"):
+    from audio_stream import AudioStream
+    from mel_features import IncrementalMelSpectrogram
 
-def audio_loop():
-    print("Audio monitoring started...")
+    model_registry.get("audio_service")
+    print(f"Audio monitoring started ({mic_id})...")
 
-    while True:
-        recording = sd.rec(
-            int(AUDIO_DURATION * SAMPLE_RATE),
-            samplerate=SAMPLE_RATE,
-            channels=1,
-            dtype='float32'
-        )
-        sd.wait()
+    stream = AudioStream(
+        sample_rate=SAMPLE_RATE,
+        window_seconds=AUDIO_DURATION,
+        hop_seconds=AUDIO_HOP,
+        device=parse_source(device) if device is not None else None
+    )
+
+    # Only the STFT columns of each new hop are computed
+    features = IncrementalMelSpectrogram(
+        sample_rate=SAMPLE_RATE,
+        window_seconds=AUDIO_DURATION
+    )
+
+    with stream:
+        for chunk in stream.hops():
+            features.push(chunk)
 
-        audio = recording.flatten()
-        label, conf = predict_audio(audio)
+            # Keep features current but only predict on the newest hop
+            if not features.ready or stream.backlog >= stream.hop:
+                continue
 
-        if label != "normal" and conf > AUDIO_THRESHOLD:
-            print(f"AUDIO ALERT: {label} ({conf:.2f})")
+            label, conf = predict_mel(features.model_input(), mic_id)
 
-            requests.post(
-                f"{API_URL}/audio_alert",
-                json={
+            if label != "normal" and conf > AUDIO_THRESHOLD:
+                print(f"AUDIO ALERT [{mic_id}]: {label} ({conf:.2f})")
+
+                publisher.publish("audio", {
                     "label": label,
                     "confidence": conf,
-                    "timestamp": time.time()
-                }
-            )
+                    "timestamp": time.time(),
+                    "source": mic_id
+                })
+
+def publish_violations(violations, source, camera_id=None):
+    for violation in violations:
+        if not violation["new"]:
+            continue
+
+        print(
+            f"VIDEO ALERT{f' [{camera_id}]' if camera_id else ''}: "
+            f"{violation['rule']} in {violation['zone']}: "
+            f"{violation['label']} ({violation['confidence']:.2f})"
+        )
+
+        publisher.publish("video", {
+            "label": violation["label"],
+            "confidence": violation["confidence"],
+            "timestamp": time.time(),
+            "source": str(source),
+            "zone": violation["zone"],
+            "rule": violation["rule"],
+            "track_id": violation["track_id"]
+        })
 
-        time.sleep(0.2)
+def video_loop(source=0, headless=HEADLESS, preview_port=PREVIEW_PORT):
+    from motion_detect import MotionGate, shift_bbox
+    from frame_skip import AdaptiveFrameSkip
+    from models.yolo_model import boxes_from_result
+    from tracker import MultiObjectTracker
+    from zones import compile_rules
 
-def video_loop():
+    yolo_model = model_registry.get("yolo")
     print("Video monitoring started...")
-    cap = cv2.VideoCapture(0)
-    frame_count = 0
+    cap = cv2.VideoCapture(parse_source(source))
+    motion_gate = MotionGate()
+    frame_skip = AdaptiveFrameSkip(
+        initial_skip=FRAME_SKIP,
+        latency_budget_ms=VIDEO_LATENCY_BUDGET_MS
+    )
+
+    # Drawing only happens when a window or preview client wants the frame
+    preview = Preview("Video Feed", headless=headless, port=preview_port)
+
+    # Zone rules are compiled for the frame size on the first frame
+    rules = None
+    tracker = None
 
     while True:
         ret, frame = cap.read()
         if not ret:
             break
 
-        frame_count += 1
+        if rules is None:
+            rules = compile_rules(source, frame.shape)
+            # Alerts fire once per rule violation instead of once per box per frame
+            tracker = MultiObjectTracker(labels=rules.labels)
+
+        if not frame_skip.tick():
+            if preview.wants_frame() and not preview.show(frame):
+                break
+            continue
 
-        if frame_count % FRAME_SKIP != 0:
-            cv2.imshow("Video Feed", frame)
-            if cv2.waitKey(1) & 0xFF == ord("q"):
+        # Only look at the zones, skip YOLO on static scenes and only
+        # look at the moving region inside them
+        roi, roi_offset = rules.crop(frame)
+        crop, offset = motion_gate.gate(roi)
+        if crop is None:
+            frame_skip.update()
+            if preview.wants_frame() and not preview.show(frame):
                 break
             continue
 
-        results = yolo_model(frame)
-
-        for r in results:
-            for box in r.boxes:
-                cls = int(box.cls[0])
-                label = yolo_model.names[cls]
-                confidence = float(box.conf[0])
-
-                if label in ["person", "knife", "scissors", "gun"]:
-                    print(f"VIDEO ALERT: {label} ({confidence:.2f})")
-
-                    requests.post(
-                        f"{API_URL}/video_alert",
-                        json={
-                            "label": label,
-                            "confidence": confidence,
-                            "timestamp": time.time()
-                        }
-                    )
-
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(
-                    frame, label, (x1, y1 - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2
-                )
-
-        cv2.imshow("Video Feed", frame)
-        if cv2.waitKey(1) & 0xFF == ord("q"):
+        start = time.perf_counter()
+        results = yolo_model(crop, verbose=False)
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        detections = boxes_from_result(results[0], yolo_model.names)
+        for d in detections:
+            d["bbox"] = shift_bbox(shift_bbox(d["bbox"], offset), roi_offset)
+
+        events = tracker.update(detections)
+        rules.forget(e["track_id"] for e in events if e["event"] == "end")
+
+        # All live tracks, not just those matched this frame, so a missed
+        # detection does not re-trigger the same violation
+        tracks = [t.to_dict() for t in tracker.confirmed_tracks()]
+
+        publish_violations(rules.evaluate(tracks), source)
+
+        frame_skip.update(latency_ms, labels=[d["label"] for d in detections])
+
+        if not preview.wants_frame():
+            continue
+
+        rules.draw(frame)
+
+        for track in tracker.active_tracks():
+            x1, y1, x2, y2 = track.bbox
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(
+                frame, f"{track.label} #{track.track_id}", (x1, y1 - 5),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2
+            )
+
+        if not preview.show(frame):
             break
 
     cap.release()
-    cv2.destroyAllWindows()
+    preview.close()
+
+def camera_loop(sources):
+    """
+    Several cameras on one host: CameraManager captures every source
+    and shares a pool of YOLO workers; each result goes through that
+    camera's tracker and zone rules like in video_loop. Headless only.
+    """
+
+    from camera_manager import CameraManager
+    from tracker import MultiObjectTracker
+
+    # A camera is handed to one worker at a time, so its tracker and
+    # rules are never updated concurrently
+    trackers = {}
+
+    def on_result(camera_id, captured_at, annotated_frame, detections):
+        cam = manager.camera(camera_id)
+        rules = cam.rules
+
+        tracker = trackers.get(camera_id)
+        if tracker is None:
+            tracker = trackers[camera_id] = MultiObjectTracker(labels=rules.labels)
+
+        events = tracker.update(detections)
+        rules.forget(e["track_id"] for e in events if e["event"] == "end")
+
+        tracks = [t.to_dict() for t in tracker.confirmed_tracks()]
+        publish_violations(rules.evaluate(tracks, captured_at), cam.source, camera_id)
+
+    manager = CameraManager(
+        sources,
+        on_result=on_result,
+        motion_gate=True,
+        zones=True,
+        latency_budget_ms=VIDEO_LATENCY_BUDGET_MS
+    )
+    manager.start()
+    print(f"Video monitoring started ({len(sources)} cameras)...")
+
+    try:
+        while any(cam.running for cam in manager.cameras):
+            time.sleep(1)
+    finally:
+        manager.stop()
 
 if __name__ == "__main__":
-    print("Backend system starting...")
+    parser = argparse.ArgumentParser(description="Suspicious activity detection backend")
+    parser.add_argument("source", nargs="*", default=[0],
+                        help="camera index, RTSP URL or video file; several run on a shared worker pool")
+    parser.add_argument("--mode", choices=["all", "audio", "video"], default="all")
+    parser.add_argument("--no-warmup", action="store_true", help="skip warm-up inference after loading")
+    parser.add_argument("--headless", action="store_true", default=HEADLESS, help="no window, no drawing")
+    parser.add_argument("--preview-port", type=int, default=PREVIEW_PORT, help="serve an MJPEG preview on this port")
+    args = parser.parse_args()
+
+    if args.no_warmup:
+        model_registry.WARMUP = False
+
+    print(f"Backend system starting ({args.mode})...")
+    publisher.start()
+
+    audio_threads = []
+    if args.mode in ("all", "audio"):
+        for i, device in enumerate(AUDIO_DEVICES or [None]):
+            audio_thread = threading.Thread(
+                target=audio_loop,
+                args=(device, f"mic{i}"),
+                daemon=True
+            )
+            audio_thread.start()
+            audio_threads.append(audio_thread)
 
-    audio_thread = threading.Thread(target=audio_loop, daemon=True)
-    audio_thread.start()
+    if args.mode in ("all", "video"):
+        try:
+            if len(args.source) > 1:
+                camera_loop(args.source)
+            else:
+                video_loop(args.source[0], args.headless, args.preview_port)
+        except KeyboardInterrupt:
+            pass
+    else:
+        try:
+            for audio_thread in audio_threads:
+                audio_thread.join()
+        except KeyboardInterrupt:
+            pass
 
-    video_loop()
+    publisher.stop()
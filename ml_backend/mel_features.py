@@ -0,0 +1,111 @@
+import cv2
+import librosa
+import numpy as np
+
+SAMPLE_RATE = 22050
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+TOP_DB = 80.0
+
+# Spatial size expected by the audio CNN
+MODEL_INPUT_SIZE = (128, 128)
+
+
+def power_to_db(mel, top_db=TOP_DB):
+    """
+    Same result as librosa.power_to_db(mel, ref=np.max).
+    """
+
+    log_spec = 10.0 * np.log10(np.maximum(mel, 1e-10))
+    log_spec -= 10.0 * np.log10(max(float(mel.max()), 1e-10))
+    return np.maximum(log_spec, log_spec.max() - top_db)
+
+
+def compute_mel_db(audio, sr=SAMPLE_RATE, n_mels=N_MELS, hop_length=HOP_LENGTH):
+    """
+    Full (non-incremental) log-mel spectrogram of a whole clip.
+    """
+
+    mel = librosa.feature.melspectrogram(y=audio, sr=sr, n_mels=n_mels, hop_length=hop_length)
+    return librosa.power_to_db(mel, ref=np.max)
+
+
+def to_model_input(mel_db):
+    """
+    Resize a (n_mels, frames) log-mel spectrogram to the 128x128
+    single-channel image the audio CNN is fed.
+    """
+
+    return cv2.resize(mel_db.astype(np.float32), MODEL_INPUT_SIZE)
+
+
+class IncrementalMelSpectrogram:
+    """
+    Rolling mel spectrogram over a sliding audio window.
+
+    push() receives only the new samples of each hop. Only the STFT
+    columns that became complete are computed (one rfft per column and
+    a matmul with the cached mel filterbank); older columns are kept
+    in a rolling buffer covering `window_seconds` of audio.
+
+    Frames are not centred/padded like librosa's default, so the first
+    and last column differ slightly from a full recompute.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, window_seconds=2.0, n_fft=N_FFT,
+                 hop_length=HOP_LENGTH, n_mels=N_MELS):
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_frames = 1 + int(window_seconds * sample_rate) // hop_length
+
+        # Periodic Hann window, as used by librosa.stft
+        self.fft_window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)).astype(np.float32)
+        self.mel_basis = librosa.filters.mel(sr=sample_rate, n_fft=n_fft, n_mels=n_mels).astype(np.float32)
+
+        self.mel = np.zeros((n_mels, self.n_frames), dtype=np.float32)
+        self.filled = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def reset(self):
+        self.mel[:] = 0
+        self.filled = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def push(self, samples):
+        """
+        Add new samples; returns the number of new STFT columns.
+        """
+
+        pending = np.concatenate((self._pending, np.asarray(samples, dtype=np.float32).ravel()))
+
+        if len(pending) < self.n_fft:
+            self._pending = pending
+            return 0
+
+        n_new = 1 + (len(pending) - self.n_fft) // self.hop_length
+        frames = np.lib.stride_tricks.sliding_window_view(pending, self.n_fft)[::self.hop_length][:n_new]
+
+        spectrum = np.fft.rfft(frames * self.fft_window, axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        columns = self.mel_basis @ power.T.astype(np.float32)
+
+        if n_new >= self.n_frames:
+            self.mel = np.ascontiguousarray(columns[:, -self.n_frames:])
+        else:
+            self.mel = np.concatenate((self.mel[:, n_new:], columns), axis=1)
+
+        self.filled = min(self.n_frames, self.filled + n_new)
+        self._pending = pending[n_new * self.hop_length:]
+
+        return n_new
+
+    @property
+    def ready(self):
+        return self.filled >= self.n_frames
+
+    def mel_db(self):
+        return power_to_db(self.mel)
+
+    def model_input(self):
+        return to_model_input(self.mel_db())
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+import numpy as np
+
+# Run one dummy inference right after loading so the first real
+# frame/window does not pay for graph tracing and allocator warm-up
+WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+
+_loaders = {}
+_models = {}
+
+# One lock per model so audio and video models can load in parallel
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def register(name, loader, warmup=None):
+    """
+    Register a model by name. loader() builds it, warmup(model) is
+    optional. Nothing is imported or loaded until get() is called.
+    """
+
+    _loaders[name] = (loader, warmup)
+
+
+def _lock_for(name):
+    with _locks_guard:
+        if name not in _locks:
+            _locks[name] = threading.Lock()
+        return _locks[name]
+
+
+def get(name, warmup=None):
+    """
+    Load a registered model on first use, once per process.
+    """
+
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    if name not in _loaders:
+        raise KeyError(f"Unknown model: {name}")
+
+    if warmup is None:
+        warmup = WARMUP
+
+    with _lock_for(name):
+        if name in _models:
+            return _models[name]
+
+        loader, warmup_fn = _loaders[name]
+
+        start = time.perf_counter()
+        print(f"Loading {name} model...")
+        model = loader()
+
+        if warmup and warmup_fn is not None:
+            warmup_fn(model)
+
+        print(f"{name} model ready in {time.perf_counter() - start:.1f}s")
+        _models[name] = model
+        return model
+
+
+def is_loaded(name):
+    return name in _models
+
+
+# =========================
+# BUILT-IN MODELS
+# =========================
+
+def _load_yolo():
+    from ultralytics import YOLO
+    from inference_backend import yolo_model_path
+
+    return YOLO(yolo_model_path(), task="detect")
+
+
+def _warmup_yolo(model):
+    model(np.zeros((480, 640, 3), dtype=np.uint8), verbose=False)
+
+
+def _load_audio():
+    from inference_backend import load_audio_backend
+
+    return load_audio_backend()
+
+
+def _warmup_audio(backend):
+    backend.predict_batch(np.zeros((1, 128, 128, 1), dtype=np.float32))
+
+
+def _load_audio_keras():
+    import tensorflow as tf
+    from inference_backend import AUDIO_MODEL_PATH
+
+    return tf.keras.models.load_model(AUDIO_MODEL_PATH)
+
+
+register("yolo", _load_yolo, _warmup_yolo)
+register("audio", _load_audio, _warmup_audio)
+
+# Raw 3-channel Keras model, for tools that use the original model directly
+register("audio_keras", _load_audio_keras)
@@ -1,43 +1,84 @@
 from ultralytics import YOLO
 import cv2
+import time
 from collections import defaultdict
 
+def boxes_from_result(result, names):
+    """
+    Detections of one ultralytics result as dicts with label,
+    confidence and an x1, y1, x2, y2 bbox.
+    """
+
+    detections = []
+    for box in result.boxes:
+        x1, y1, x2, y2 = box.xyxy[0].tolist()
+        detections.append({
+            "label": names[int(box.cls[0])],
+            "confidence": float(box.conf[0]),
+            "bbox": (int(x1), int(y1), int(x2), int(y2))
+        })
+    return detections
+
 class YOLODetector:
-    def __init__(self, model_path="yolov8n.pt"):
-        print("Loading YOLO model...")
-        self.model = YOLO(model_path)
+    def __init__(self, model_path="yolov8n.pt", batched=True):
+        """
+        model_path may point to the PyTorch weights or to an ONNX export
+        (see export_models.py); ultralytics runs .onnx files through
+        onnxruntime on CPU.
+        """
+
+        print(f"Loading YOLO model ({model_path})...")
+        self.model = YOLO(model_path, task="detect")
+
+        # Send a whole frame sequence through the model in one call
+        # instead of one call per frame
+        self.batched = batched
 
-    def detect(self, frames):
+        # Wall-clock time of the last detect() call, in milliseconds
+        self.last_latency_ms = 0.0
+
+    def _infer(self, frames):
+        if self.batched:
+            return self.model(frames, verbose=False)
+
+        return [self.model(frame, verbose=False)[0] for frame in frames]
+
+    def detect_frames(self, frames, annotate=True):
         """
-        IEEE paper inspired change:
-        - Accepts a sequence of frames instead of a single frame
-        - Aggregates detections across time (spatio-temporal reasoning)
+        Per-frame detections without aggregation, for the tracker:
+        returns (annotated last frame or None, one detection list per frame).
         """
 
-        # Allow backward compatibility (single frame input)
         if not isinstance(frames, list):
             frames = [frames]
 
-        aggregated_detections = defaultdict(list)
-        annotated_frame = None
+        start = time.perf_counter()
 
-        for frame in frames:
-            results = self.model(frame, verbose=False)
-            result = results[0]
+        results = self._infer(frames)
+        per_frame = [boxes_from_result(r, self.model.names) for r in results]
+        annotated_frame = results[-1].plot() if annotate else None
 
-            # Keep last annotated frame for visualization
-            annotated_frame = result.plot()
+        self.last_latency_ms = (time.perf_counter() - start) * 1000
 
-            for box in result.boxes:
-                cls_id = int(box.cls[0])
-                class_name = self.model.names[cls_id]
-                confidence = float(box.conf[0])
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
+        return annotated_frame, per_frame
 
-                aggregated_detections[class_name].append({
-                    "confidence": confidence,
-                    "bbox": (int(x1), int(y1), int(x2), int(y2))
-                })
+    def detect(self, frames, annotate=True):
+        """
+        IEEE paper inspired change:
+        - Accepts a sequence of frames instead of a single frame
+        - Aggregates detections across time (spatio-temporal reasoning)
+
+        The sequence is inferred as one batch and only the last frame
+        (the one that is displayed) is annotated.
+        """
+
+        # Single frames are accepted for backward compatibility
+        annotated_frame, per_frame = self.detect_frames(frames, annotate)
+
+        aggregated_detections = defaultdict(list)
+        for detections in per_frame:
+            for d in detections:
+                aggregated_detections[d["label"]].append(d)
 
         # Aggregate detections across frames
         final_detections = []
@@ -1,58 +1,193 @@
+import argparse
 import cv2
 import numpy as np
+from camera_manager import parse_source
+from preview import Preview, HEADLESS, PREVIEW_PORT
 
-def main():
-    cap = cv2.VideoCapture(0)  
+# Motion is computed on a downscaled copy of the frame
+MOTION_FRAME_SIZE = (640, 480)
+MIN_CONTOUR_AREA = 800
+DIFF_THRESHOLD = 25
 
-    if not cap.isOpened():
-        print("Could not open webcam")
-        return
+# Extra pixels kept around the motion region when cropping for YOLO
+CROP_PADDING = 32
 
-    print("Motion Detection Started. Press 'q' to quit.")
+# Keep running inference for this many gated frames after motion stops,
+# so a person who freezes in view is not dropped immediately
+MOTION_HOLD_FRAMES = 3
 
-    ret, frame1 = cap.read()
-    frame1 = cv2.resize(frame1, (640, 480))
-    gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-    gray1 = cv2.GaussianBlur(gray1, (21, 21), 0)
 
-    while True:
-        ret, frame2 = cap.read()
-        frame2 = cv2.resize(frame2, (640, 480))
+class MotionDetector:
+    """
+    Cheap frame differencing used as a gate in front of YOLO.
+    Compares each frame with the previous one and returns the
+    regions that changed, in the coordinates of the original frame.
+    """
+
+    def __init__(self, min_area=MIN_CONTOUR_AREA, threshold=DIFF_THRESHOLD,
+                 frame_size=MOTION_FRAME_SIZE):
+        self.min_area = min_area
+        self.threshold = threshold
+        self.frame_size = frame_size
+        self.prev_gray = None
 
-        gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.GaussianBlur(gray2, (21, 21), 0)
+    def _prepare(self, frame):
+        small = cv2.resize(frame, self.frame_size)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (21, 21), 0)
 
-        diff = cv2.absdiff(gray1, gray2)
-        thresh = cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)[1]
+    def update(self, frame):
+        """
+        Returns the list of motion boxes (x1, y1, x2, y2) between this
+        frame and the previous one. The first frame never has motion.
+        """
+
+        gray = self._prepare(frame)
+
+        if self.prev_gray is None:
+            self.prev_gray = gray
+            return []
+
+        diff = cv2.absdiff(self.prev_gray, gray)
+        self.prev_gray = gray
+
+        thresh = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)[1]
         thresh = cv2.dilate(thresh, None, iterations=2)
 
-        contours, _ = cv2.findContours(thresh.copy(),
+        contours, _ = cv2.findContours(thresh,
                                        cv2.RETR_EXTERNAL,
                                        cv2.CHAIN_APPROX_SIMPLE)
 
-        motion_detected = False
+        # Scale boxes back to the original frame size
+        sx = frame.shape[1] / self.frame_size[0]
+        sy = frame.shape[0] / self.frame_size[1]
 
+        boxes = []
         for contour in contours:
-            if cv2.contourArea(contour) < 800:  
+            if cv2.contourArea(contour) < self.min_area:
                 continue
 
-            motion_detected = True
             (x, y, w, h) = cv2.boundingRect(contour)
-            cv2.rectangle(frame2, (x, y), (x + w, y + h), (0, 0, 255), 2)
+            boxes.append((int(x * sx), int(y * sy), int((x + w) * sx), int((y + h) * sy)))
 
-        if motion_detected:
-            cv2.putText(frame2, "MOTION DETECTED", (20, 40),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
+        return boxes
+
+
+class MotionGate:
+    """
+    Decides whether a frame should go through YOLO and which part of it.
+    gate(frame) returns (crop, offset) for frames with motion (or during
+    the hold period, where the full frame is used) and (None, None) for
+    static scenes.
+    """
+
+    def __init__(self, hold_frames=MOTION_HOLD_FRAMES, padding=CROP_PADDING, **detector_kwargs):
+        self.detector = MotionDetector(**detector_kwargs)
+        self.hold_frames = hold_frames
+        self.padding = padding
+        self._hold = 0
+        self.passed = 0
+        self.skipped = 0
+
+    def gate(self, frame):
+        boxes = self.detector.update(frame)
+
+        if boxes:
+            self._hold = self.hold_frames
+            self.passed += 1
+            return crop_to_motion(frame, boxes, self.padding)
+
+        if self._hold > 0:
+            self._hold -= 1
+            self.passed += 1
+            return frame, (0, 0)
+
+        self.skipped += 1
+        return None, None
+
+
+def union_box(boxes, frame_shape, padding=CROP_PADDING):
+    """
+    Smallest box covering all motion boxes, padded and clipped to the frame.
+    """
+
+    if not boxes:
+        return None
+
+    h, w = frame_shape[:2]
+    x1 = max(min(b[0] for b in boxes) - padding, 0)
+    y1 = max(min(b[1] for b in boxes) - padding, 0)
+    x2 = min(max(b[2] for b in boxes) + padding, w)
+    y2 = min(max(b[3] for b in boxes) + padding, h)
+
+    return x1, y1, x2, y2
 
-        cv2.imshow("Motion Detection", frame2)
 
-        gray1 = gray2  
+def crop_to_motion(frame, boxes, padding=CROP_PADDING):
+    """
+    Returns (crop, (offset_x, offset_y)) for the union of the motion
+    boxes, or (None, None) when nothing moved.
+    """
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+    region = union_box(boxes, frame.shape, padding)
+    if region is None:
+        return None, None
+
+    x1, y1, x2, y2 = region
+    return frame[y1:y2, x1:x2], (x1, y1)
+
+
+def shift_bbox(bbox, offset):
+    """
+    Maps a bbox found in a crop back to full-frame coordinates.
+    """
+
+    ox, oy = offset
+    x1, y1, x2, y2 = bbox
+    return x1 + ox, y1 + oy, x2 + ox, y2 + oy
+
+
+def main(source=0, headless=HEADLESS, preview_port=PREVIEW_PORT):
+    cap = cv2.VideoCapture(parse_source(source))
+
+    if not cap.isOpened():
+        print("Could not open webcam")
+        return
+
+    print("Motion Detection Started. Press 'q' to quit.")
+
+    detector = MotionDetector()
+    preview = Preview("Motion Detection", headless=headless, port=preview_port)
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        frame = cv2.resize(frame, MOTION_FRAME_SIZE)
+        boxes = detector.update(frame)
+
+        if not preview.wants_frame():
+            continue
+
+        for (x1, y1, x2, y2) in boxes:
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+
+        if boxes:
+            cv2.putText(frame, "MOTION DETECTED", (20, 40),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
+
+        if not preview.show(frame):
             break
 
     cap.release()
-    cv2.destroyAllWindows()
+    preview.close()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Motion detection on one camera")
+    parser.add_argument("source", nargs="?", default=0, help="camera index, RTSP URL or video file")
+    parser.add_argument("--headless", action="store_true", default=HEADLESS, help="no window, no drawing")
+    parser.add_argument("--preview-port", type=int, default=PREVIEW_PORT, help="serve an MJPEG preview on this port")
+    args = parser.parse_args()
+
+    main(args.source, args.headless, args.preview_port)
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+# Fixed number of sender threads shared by all events
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "4"))
+
+# Minimum time between two notifications for the same (source, label),
+# measured from the last notification, so an incident that keeps
+# producing events is notified again once per cooldown
+NOTIFY_COOLDOWN = float(os.getenv("NOTIFY_COOLDOWN", "60"))
+
+# How often keys idle for longer than the cooldown are forgotten
+PRUNE_INTERVAL = 300
+
+# Sends waiting for a worker; beyond this new notifications are dropped
+MAX_PENDING_SENDS = 1000
+
+
+class NotificationDispatcher:
+    """
+    Fixed worker pool for outgoing notifications with a per-key
+    cooldown.
+
+    A key is usually (source, label). notify() fans one message out to
+    all recipients of the provider (a notifications.Notifier) in
+    parallel; submit() runs any send function under the same
+    suppression rules. Both return False when the event was suppressed
+    or dropped, and never block on the provider. The worker threads
+    start on the first send.
+    """
+
+    def __init__(self, provider=None, workers: int = NOTIFY_WORKERS,
+                 cooldown: float = NOTIFY_COOLDOWN):
+        self.provider = provider
+        self.cooldown = cooldown
+        self.workers = workers
+        self._executor = None
+
+        self._last_sent: Dict[Hashable, float] = {}
+        self._last_seen: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+        self._pending = threading.BoundedSemaphore(MAX_PENDING_SENDS)
+
+        self.sent = 0
+        self.failed = 0
+        self.suppressed = 0
+        self.dropped = 0
+
+    def should_send(self, key: Hashable, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+
+        with self._lock:
+            if now >= self._next_prune:
+                self._next_prune = now + PRUNE_INTERVAL
+                self._prune(now - self.cooldown)
+
+            last_sent = self._last_sent.get(key)
+            self._last_seen[key] = now
+
+            if last_sent is not None and now - last_sent < self.cooldown:
+                self.suppressed += 1
+                return False
+
+            self._last_sent[key] = now
+            return True
+
+    def _run(self, fn: Callable, args: tuple):
+        try:
+            # Notifiers report failures by returning False
+            ok = fn(*args) is not False
+        except Exception as e:
+            ok = False
+            print("Notification failed:", e)
+        finally:
+            self._pending.release()
+
+        # Several workers finish at once
+        with self._lock:
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+
+    def _enqueue(self, fn: Callable, *args) -> bool:
+        if not self._pending.acquire(blocking=False):
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="notify")
+        self._executor.submit(self._run, fn, args)
+        return True
+
+    def submit(self, key: Hashable, fn: Callable, *args) -> bool:
+        if not self.should_send(key):
+            return False
+        return self._enqueue(fn, *args)
+
+    def notify(self, key: Hashable, body: str, recipients: List[Tuple[str, str]]) -> bool:
+        """
+        recipients is a list of (to, channel) pairs; each is sent on its
+        own worker.
+        """
+
+        if not recipients or not self.should_send(key):
+            return False
+
+        for to, channel in recipients:
+            self._enqueue(self.provider.send, to, body, channel)
+        return True
+
+    def _prune(self, cutoff: float):
+        # Called with the lock held
+        for key in [k for k, t in self._last_seen.items() if t < cutoff]:
+            self._last_seen.pop(key, None)
+            self._last_sent.pop(key, None)
+
+    def forget_idle(self, max_age: float):
+        """
+        Drop keys not seen for max_age seconds to bound memory. Keys idle
+        for longer than the cooldown are also dropped every
+        PRUNE_INTERVAL seconds by should_send().
+        """
+
+        with self._lock:
+            self._prune(time.time() - max_age)
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.provider.stats() if self.provider is not None else None,
+            "sent": self.sent,
+            "failed": self.failed,
+            "suppressed": self.suppressed,
+            "dropped": self.dropped,
+            "tracked_keys": len(self._last_seen)
+        }
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+# No window and no drawing unless a preview client is connected
+HEADLESS = os.getenv("HEADLESS", "0") == "1"
+
+# MJPEG preview port, 0 to disable
+PREVIEW_PORT = int(os.getenv("PREVIEW_PORT", "0"))
+
+# Preview frames per second sent to clients, independent of the detection rate
+PREVIEW_FPS = 5
+JPEG_QUALITY = 70
+
+BOUNDARY = "frame"
+
+
+class MJPEGServer:
+    """
+    Serves the latest preview frame as multipart/x-mixed-replace on
+    http://<host>:<port>/. Frames are JPEG-encoded on the client
+    threads, outside the lock, so put() on the detection thread never
+    waits for an encode; the result is cached for the other clients.
+    """
+
+    def __init__(self, port, host="0.0.0.0", quality=JPEG_QUALITY):
+        self.quality = quality
+        self.clients = 0
+
+        self._frame = None
+        self._seq = 0
+        self._jpeg = None
+        self._jpeg_seq = -1
+        self._cond = threading.Condition()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._stream(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mjpeg", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        print(f"MJPEG preview on port {self._httpd.server_address[1]}")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        with self._cond:
+            self._cond.notify_all()
+
+    def put(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self._cond.notify_all()
+
+    def _encoded(self, seq, frame, jpeg):
+        if jpeg is not None:
+            return jpeg
+
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        jpeg = buf.tobytes() if ok else None
+
+        with self._cond:
+            if seq > self._jpeg_seq:
+                self._jpeg = jpeg
+                self._jpeg_seq = seq
+        return jpeg
+
+    def _stream(self, handler):
+        handler.send_response(200)
+        handler.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.end_headers()
+
+        with self._cond:
+            self.clients += 1
+        last_seq = 0
+
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq != last_seq, timeout=5)
+                    if self._seq == last_seq:
+                        continue
+                    last_seq = self._seq
+                    frame = self._frame
+                    jpeg = self._jpeg if self._jpeg_seq == last_seq else None
+
+                jpeg = self._encoded(last_seq, frame, jpeg)
+
+                if jpeg is None:
+                    continue
+
+                handler.wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                )
+                handler.wfile.write(jpeg)
+                handler.wfile.write(b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self._cond:
+                self.clients -= 1
+
+
+class Preview:
+    """
+    Destination for annotated frames: an OpenCV window, an MJPEG
+    stream, or nothing.
+
+    Callers check wants_frame() before drawing, so in headless mode
+    with no one watching no annotation, plotting or encoding happens
+    and detection runs at full speed. The stream only asks for a frame
+    every 1 / fps seconds while at least one client is connected.
+    """
+
+    def __init__(self, window_name, headless=HEADLESS, port=PREVIEW_PORT, fps=PREVIEW_FPS):
+        self.window_name = window_name
+        self.headless = headless
+        self.interval = 1.0 / fps
+        self._next_frame = 0.0
+
+        self.server = MJPEGServer(port).start() if port else None
+
+    def wants_frame(self) -> bool:
+        if not self.headless:
+            return True
+        if self.server is None or self.server.clients == 0:
+            return False
+        return time.monotonic() >= self._next_frame
+
+    def show(self, frame) -> bool:
+        """
+        Publish a frame; returns False when the user pressed 'q'.
+        """
+
+        if self.server is not None and self.server.clients and time.monotonic() >= self._next_frame:
+            self._next_frame = time.monotonic() + self.interval
+            self.server.put(frame)
+
+        if self.headless:
+            return True
+
+        cv2.imshow(self.window_name, frame)
+        return not (cv2.waitKey(1) & 0xFF == ord("q"))
+
+    def close(self):
+        if self.server is not None:
+            self.server.stop()
+        if not self.headless:
+            cv2.destroyAllWindows()
@@ -1,47 +1,39 @@
-import sounddevice as sd
-import numpy as np
-import librosa
-import tensorflow as tf
+import model_registry
 from scipy.io.wavfile import write
-import time
-
-MODEL_PATH = "audio_model.h5"
-model = tf.keras.models.load_model(MODEL_PATH)
-
-CLASSES = ["scream", "glass_break", "alarm", "normal"]
+from audio_stream import AudioStream
+from audio_inference import AudioInferenceService, CLASSES
+from mel_features import compute_mel_db, to_model_input
 
 SAMPLE_RATE = 22050
 DURATION = 2  
+HOP = 0.25
 
-def predict_audio(audio):
-    mel = librosa.feature.melspectrogram(y=audio, sr=SAMPLE_RATE, n_mels=128)
-    mel_db = librosa.power_to_db(mel, ref=np.max)
-    mel_db = np.resize(mel_db, (128, 128))
-    mel_db = np.expand_dims(mel_db, axis=-1)
-    mel_db = np.repeat(mel_db, 3, axis=-1)
-    mel_db = np.expand_dims(mel_db, axis=0)
+_service = None
 
-    preds = model.predict(mel_db)
-    index = np.argmax(preds)
-    confidence = preds[0][index]
+def get_service():
+    global _service
+    if _service is None:
+        _service = AudioInferenceService(model_registry.get("audio"), CLASSES)
+    return _service
 
-    return CLASSES[index], confidence
-
-print("Real-time audio monitoring started...")
-print("Speak, scream, or make a noise...")
+def predict_audio(audio):
+    mel_db = compute_mel_db(audio, sr=SAMPLE_RATE)
+    return get_service().predict(to_model_input(mel_db))
 
-while True:
-    print("\n Listening...")
-    recording = sd.rec(int(DURATION * SAMPLE_RATE), samplerate=SAMPLE_RATE, channels=1, dtype='float32')
-    sd.wait()
+def main():
+    get_service()
 
-    audio = recording.flatten()
+    print("Real-time audio monitoring started...")
+    print("Speak, scream, or make a noise...")
 
-    label, conf = predict_audio(audio)
-    print(f"Prediction: {label} (confidence: {conf:.2f})")
+    with AudioStream(sample_rate=SAMPLE_RATE, window_seconds=DURATION, hop_seconds=HOP) as stream:
+        for audio in stream.windows():
+            label, conf = predict_audio(audio)
+            print(f"Prediction: {label} (confidence: {conf:.2f})")
 
-    # optional alert
-    if label != "normal" and conf > 0.6:
-        print(" ALERT! Suspicious audio detected!")
+            # optional alert
+            if label != "normal" and conf > 0.6:
+                print(" ALERT! Suspicious audio detected!")
 
-    time.sleep(0.5)
+if __name__ == "__main__":
+    main()
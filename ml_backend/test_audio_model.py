@@ -1,19 +1,22 @@
+import sys
 import numpy as np
-import librosa
-import tensorflow as tf
-import matplotlib.pyplot as plt
+import model_registry
+from audio_cache import load_mel
+from mel_features import to_model_input
 
-MODEL_PATH = "audio_model.h5"
 CLASSES = ["scream", "glass_break", "alarm", "normal"]
 
-model = tf.keras.models.load_model(MODEL_PATH)
-
 def predict_audio(file_path):
-    y, sr = librosa.load(file_path, sr=22050)
-    S = librosa.feature.melspectrogram(y=y, sr=sr)
-    S = librosa.power_to_db(S, ref=np.max)
-    S = np.resize(S, (128,128))
-    S = np.stack([S, S, S], axis=-1) / 255.0
+    # Loaded on first call (once per process), not at import time
+    model = model_registry.get("audio_keras")
+
+    # Decoding, resampling and the mel are cached across runs, so
+    # evaluating several checkpoints on the same clips only runs the model
+    S = load_mel(file_path, sr=22050)
+
+    # Same preprocessing as training (build_feature_cache) and the live detector
+    S = to_model_input(S)
+    S = np.stack([S, S, S], axis=-1)
     S = np.expand_dims(S, axis=0)
 
     pred = model.predict(S)
@@ -21,4 +24,5 @@ def predict_audio(file_path):
     
     print(f"Prediction: {CLASSES[class_id]} (confidence: {pred[0][class_id]:.2f})")
 
-predict_audio("audio_dataset/scream/220663__marionagm90__scream.wav")
+if __name__ == "__main__":
+    predict_audio(sys.argv[1] if len(sys.argv) > 1 else "audio_dataset/scream/220663__marionagm90__scream.wav")
@@ -0,0 +1,236 @@
+import itertools
+from collections import Counter
+from typing import Iterable, List, Optional
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+# A detection must overlap a track's predicted box at least this much
+IOU_THRESHOLD = 0.3
+
+# Updates a track may go unmatched before it is dropped
+MAX_AGE = 5
+
+# Matched updates before a track is reported (filters one-frame flickers)
+MIN_HITS = 2
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise IoU of two (N, 4) and (M, 4) arrays of x1, y1, x2, y2 boxes.
+    """
+
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+
+    a = a[:, None, :]
+    b = b[None, :, :]
+
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+def _bbox_to_z(bbox):
+    x1, y1, x2, y2 = bbox
+    w, h = max(x2 - x1, 1.0), max(y2 - y1, 1.0)
+    return np.array([x1 + w / 2, y1 + h / 2, w * h, w / h], dtype=np.float64)
+
+
+def _x_to_bbox(x):
+    cx, cy, s, r = x[:4]
+    s = max(s, 1.0)
+    w = np.sqrt(s * r)
+    h = s / w
+    return (cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2)
+
+
+class KalmanBoxFilter:
+    """
+    Constant-velocity Kalman filter over (cx, cy, area, aspect ratio),
+    as used by SORT. The aspect ratio is assumed constant.
+    """
+
+    # State transition: position and area move by their velocities
+    F = np.eye(7)
+    F[0, 4] = F[1, 5] = F[2, 6] = 1
+
+    # Only cx, cy, area and aspect ratio are observed
+    H = np.eye(4, 7)
+
+    R = np.diag([1.0, 1.0, 10.0, 10.0])
+    Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 0.0001])
+
+    def __init__(self, bbox):
+        self.x = np.zeros(7)
+        self.x[:4] = _bbox_to_z(bbox)
+
+        # High uncertainty on the unobserved velocities
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4])
+
+    def predict(self):
+        # Keep the area from going negative
+        if self.x[2] + self.x[6] <= 0:
+            self.x[6] = 0.0
+
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        return _x_to_bbox(self.x)
+
+    def update(self, bbox):
+        y = _bbox_to_z(bbox) - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+
+        self.x = self.x + K @ y
+        self.P = (np.eye(7) - K @ self.H) @ self.P
+
+    @property
+    def bbox(self):
+        return _x_to_bbox(self.x)
+
+
+class Track:
+    def __init__(self, track_id: int, detection: dict):
+        self.track_id = track_id
+        self.label = detection["label"]
+        self.confidence = detection["confidence"]
+        self.kf = KalmanBoxFilter(detection["bbox"])
+
+        self.hits = 1
+        self.time_since_update = 0
+        self.confirmed = False
+
+    @property
+    def bbox(self):
+        return tuple(int(v) for v in self.kf.bbox)
+
+    def to_dict(self) -> dict:
+        return {
+            "track_id": self.track_id,
+            "label": self.label,
+            "confidence": self.confidence,
+            "bbox": self.bbox
+        }
+
+
+class MultiObjectTracker:
+    """
+    SORT-style tracker: a Kalman filter per object and Hungarian
+    matching on IoU between predicted track boxes and new detections.
+    Detections are only matched to tracks of the same label.
+
+    update() takes the detections of one inferred frame (dicts with
+    label, confidence and an x1, y1, x2, y2 bbox in frame coordinates)
+    and returns events only when a track changes state:
+
+        "start"  a track has been matched min_hits times
+        "end"    a confirmed track went unmatched for max_age updates
+
+    so an object that stays in view produces one alert instead of one
+    per frame.
+    """
+
+    def __init__(self, iou_threshold: float = IOU_THRESHOLD, max_age: int = MAX_AGE,
+                 min_hits: int = MIN_HITS, labels: Optional[Iterable[str]] = None):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.labels = set(labels) if labels is not None else None
+
+        self.tracks: List[Track] = []
+        self._ids = itertools.count(1)
+
+    def _associate(self, detections: List[dict], predicted: np.ndarray):
+        det_boxes = np.array([d["bbox"] for d in detections], dtype=np.float64).reshape(-1, 4)
+        iou = iou_matrix(predicted, det_boxes)
+
+        # Never match across labels
+        for i, track in enumerate(self.tracks):
+            for j, det in enumerate(detections):
+                if track.label != det["label"]:
+                    iou[i, j] = 0.0
+
+        matches = []
+        if iou.size:
+            rows, cols = linear_sum_assignment(-iou)
+            matches = [(i, j) for i, j in zip(rows, cols) if iou[i, j] >= self.iou_threshold]
+
+        matched_tracks = {i for i, _ in matches}
+        matched_dets = {j for _, j in matches}
+        unmatched_dets = [j for j in range(len(detections)) if j not in matched_dets]
+
+        return matches, matched_tracks, unmatched_dets
+
+    def update(self, detections: List[dict]) -> List[dict]:
+        if self.labels is not None:
+            detections = [d for d in detections if d["label"] in self.labels]
+
+        predicted = np.array([t.kf.predict() for t in self.tracks], dtype=np.float64).reshape(-1, 4)
+        matches, matched_tracks, unmatched_dets = self._associate(detections, predicted)
+
+        events = []
+
+        for i, j in matches:
+            track = self.tracks[i]
+            track.kf.update(detections[j]["bbox"])
+            track.confidence = detections[j]["confidence"]
+            track.hits += 1
+            track.time_since_update = 0
+
+            if not track.confirmed and track.hits >= self.min_hits:
+                track.confirmed = True
+                events.append({"event": "start", **track.to_dict()})
+
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.time_since_update += 1
+
+        for j in unmatched_dets:
+            track = Track(next(self._ids), detections[j])
+            self.tracks.append(track)
+            if self.min_hits <= 1:
+                track.confirmed = True
+                events.append({"event": "start", **track.to_dict()})
+
+        alive = []
+        for track in self.tracks:
+            if track.time_since_update > self.max_age:
+                if track.confirmed:
+                    events.append({"event": "end", **track.to_dict()})
+            else:
+                alive.append(track)
+        self.tracks = alive
+
+        return events
+
+    def active_tracks(self) -> List[Track]:
+        """
+        Confirmed tracks matched in the latest update.
+        """
+
+        return [t for t in self.tracks if t.confirmed and t.time_since_update == 0]
+
+    def confirmed_tracks(self) -> List[Track]:
+        """
+        Confirmed tracks still alive, including ones the detector missed
+        in the latest update; pass these to rules so a one-frame miss
+        does not look like the object left.
+        """
+
+        return [t for t in self.tracks if t.confirmed]
+
+    def counts(self) -> Counter:
+        """
+        Confirmed tracks alive per label, e.g. the number of distinct people.
+        """
+
+        return Counter(t.label for t in self.tracks if t.confirmed)
+
+    def reset(self):
+        self.tracks = []
@@ -1,71 +1,205 @@
-import os
+import argparse
+import time
+
 import numpy as np
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
+import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.callbacks import Callback, EarlyStopping
+
+from build_feature_cache import CACHE_DIR, load_features
 
-SPEC_PATH = "spectrogram_dataset"
 CLASSES = ["scream", "glass_break", "alarm", "normal"]
 IMG_SIZE = (128, 128)
-BATCH_SIZE = 8
-
-
-datagen = ImageDataGenerator(
-    rescale=1.0/255,
-    validation_split=0.2
-)
-
-train_gen = datagen.flow_from_directory(
-    SPEC_PATH,
-    target_size=IMG_SIZE,
-    batch_size=BATCH_SIZE,
-    class_mode="categorical",
-    subset="training"
-)
-
-val_gen = datagen.flow_from_directory(
-    SPEC_PATH,
-    target_size=IMG_SIZE,
-    batch_size=BATCH_SIZE,
-    class_mode="categorical",
-    subset="validation"
-)
-
-model = Sequential([
-    Conv2D(32, (3,3), activation="relu", input_shape=(128, 128, 3)),
-    MaxPooling2D(2, 2),
-
-    Conv2D(64, (3,3), activation="relu"),
-    MaxPooling2D(2, 2),
-
-    Conv2D(128, (3,3), activation="relu"),
-    MaxPooling2D(2, 2),
-
-    Flatten(),
-    Dense(128, activation="relu"),
-    Dropout(0.3),
-
-    Dense(len(CLASSES), activation="softmax")
-])
-
-model.compile(
-    optimizer="adam",
-    loss="categorical_crossentropy",
-    metrics=["accuracy"]
-)
-
-model.summary()
-
-early_stop = EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True)
-
-history = model.fit(
-    train_gen,
-    validation_data=val_gen,
-    epochs=25,
-    callbacks=[early_stop]
-)
-
-# Save model
-model.save("audio_model.h5")
-print("Model saved as audio_model.h5")
+BATCH_SIZE = 64
+EPOCHS = 25
+VALIDATION_SPLIT = 0.2
+SEED = 42
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+# Features are log-mel dB values in [-80, 0] (power_to_db with ref=max)
+MIN_DB = -80.0
+
+# Augmentation: time shift (columns), noise floor mixed in the power
+# domain (dB below the clip's peak), SpecAugment mask widths
+MAX_TIME_SHIFT = 16
+NOISE_DB_RANGE = (-60.0, -30.0)
+NOISE_PROB = 0.5
+MAX_FREQ_MASK = 16
+MAX_TIME_MASK = 16
+
+
+def build_model():
+    # Trained on 3 identical channels; inference folds the first Conv2D
+    # to one channel (inference_backend.single_channel_model)
+    return Sequential([
+        Conv2D(32, (3,3), activation="relu", input_shape=(*IMG_SIZE, 3)),
+        MaxPooling2D(2, 2),
+
+        Conv2D(64, (3,3), activation="relu"),
+        MaxPooling2D(2, 2),
+
+        Conv2D(128, (3,3), activation="relu"),
+        MaxPooling2D(2, 2),
+
+        Flatten(),
+        Dense(128, activation="relu"),
+        Dropout(0.3),
+
+        # Softmax in float32 under mixed precision
+        Dense(len(CLASSES), activation="softmax", dtype="float32")
+    ])
+
+
+def time_shift(x):
+    shift = tf.random.uniform([], -MAX_TIME_SHIFT, MAX_TIME_SHIFT + 1, dtype=tf.int32)
+    return tf.roll(x, shift, axis=1)
+
+
+def mix_noise(x):
+    # Add a random-level noise floor in the power domain, then back to dB
+    level = tf.random.uniform([], *NOISE_DB_RANGE)
+    noise = tf.random.uniform(tf.shape(x)) * tf.pow(10.0, level / 10.0)
+    power = tf.pow(10.0, x / 10.0) + noise
+    mixed = 10.0 * tf.math.log(power) / tf.math.log(10.0)
+    return tf.clip_by_value(mixed, MIN_DB, 0.0)
+
+
+def mask_axis(x, max_width, axis):
+    size = tf.shape(x)[axis]
+    width = tf.random.uniform([], 0, max_width + 1, dtype=tf.int32)
+    start = tf.random.uniform([], 0, tf.maximum(size - width, 1), dtype=tf.int32)
+    positions = tf.range(size)
+    mask = (positions >= start) & (positions < start + width)
+    mask = tf.reshape(mask, [-1, 1] if axis == 0 else [1, -1])
+    return tf.where(mask, MIN_DB, x)
+
+
+def augment(x, y):
+    x = time_shift(x)
+    x = tf.cond(tf.random.uniform([]) < NOISE_PROB, lambda: mix_noise(x), lambda: x)
+    x = mask_axis(x, MAX_FREQ_MASK, axis=0)
+    x = mask_axis(x, MAX_TIME_MASK, axis=1)
+    return x, y
+
+
+def to_model_batch(x, y):
+    # (batch, 128, 128) -> (batch, 128, 128, 3), tiled after augmentation
+    # so the three channels stay identical
+    x = tf.tile(x[..., None], [1, 1, 1, 3])
+    return x, y
+
+
+def make_dataset(features, labels, indices, batch_size, training, cache_file=""):
+    """
+    Rows are read from the memory-mapped cache in parallel, cached after
+    the first epoch (in memory, or in cache_file), then augmented,
+    batched and prefetched while the model trains on the previous batch.
+    """
+
+    def load_row(i):
+        return features[i].astype(np.float32)
+
+    def load(i, y):
+        x = tf.numpy_function(load_row, [i], tf.float32)
+        x.set_shape(IMG_SIZE)
+        return x, y
+
+    ds = tf.data.Dataset.from_tensor_slices((indices, labels[indices]))
+    ds = ds.map(load, num_parallel_calls=AUTOTUNE)
+    ds = ds.cache(cache_file)
+
+    if training:
+        ds = ds.shuffle(len(indices), seed=SEED, reshuffle_each_iteration=True)
+        ds = ds.map(augment, num_parallel_calls=AUTOTUNE)
+
+        options = tf.data.Options()
+        options.deterministic = False
+        ds = ds.with_options(options)
+
+    return ds.batch(batch_size).map(to_model_batch, num_parallel_calls=AUTOTUNE).prefetch(AUTOTUNE)
+
+
+class EpochTimer(Callback):
+    """
+    Logs wall time and training throughput per epoch.
+    """
+
+    def __init__(self, samples):
+        super().__init__()
+        self.samples = samples
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = time.perf_counter() - self._start
+        if logs is not None:
+            logs["epoch_seconds"] = seconds
+            logs["samples_per_sec"] = self.samples / seconds
+        print(f"Epoch {epoch + 1}: {seconds:.1f}s, {self.samples / seconds:.0f} samples/s")
+
+
+def split_indices(n, validation_split=VALIDATION_SPLIT, seed=SEED):
+    indices = np.random.default_rng(seed).permutation(n)
+    n_val = int(n * validation_split)
+    return np.sort(indices[n_val:]), np.sort(indices[:n_val])
+
+
+def train(cache_dir=CACHE_DIR, batch_size=BATCH_SIZE, epochs=EPOCHS, augment_data=True,
+          mixed_precision=False, output="audio_model.h5", cache_file=""):
+    features, labels, _ = load_features(cache_dir)
+    train_idx, val_idx = split_indices(len(labels))
+    print(f"{len(train_idx)} training / {len(val_idx)} validation clips")
+
+    if mixed_precision:
+        # bfloat16 matmuls on CPUs with AVX512-BF16 / AMX; weights stay float32
+        tf.keras.mixed_precision.set_global_policy("mixed_bfloat16")
+
+    train_ds = make_dataset(features, labels, train_idx, batch_size, augment_data, cache_file)
+    val_ds = make_dataset(features, labels, val_idx, batch_size, False)
+
+    model = build_model()
+    model.compile(
+        optimizer="adam",
+        loss="sparse_categorical_crossentropy",
+        metrics=["accuracy"]
+    )
+
+    model.summary()
+
+    early_stop = EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True)
+
+    model.fit(
+        train_ds,
+        validation_data=val_ds,
+        epochs=epochs,
+        callbacks=[EpochTimer(len(train_idx)), early_stop]
+    )
+
+    if mixed_precision:
+        # Save a float32 copy so inference and ONNX export are unchanged
+        tf.keras.mixed_precision.set_global_policy("float32")
+        float_model = build_model()
+        float_model.set_weights(model.get_weights())
+        model = float_model
+
+    # Save model
+    model.save(output)
+    print(f"Model saved as {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the audio CNN on the mel feature cache")
+    parser.add_argument("--cache", default=CACHE_DIR, help="directory written by build_feature_cache.py")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--no-augment", action="store_true", help="disable augmentation")
+    parser.add_argument("--mixed-precision", action="store_true", help="train with mixed_bfloat16")
+    parser.add_argument("--cache-file", default="", help="cache decoded rows on disk instead of in memory")
+    parser.add_argument("--output", default="audio_model.h5")
+    args = parser.parse_args()
+
+    train(args.cache, args.batch_size, args.epochs, not args.no_augment,
+          args.mixed_precision, args.output, args.cache_file)
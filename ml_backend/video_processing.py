@@ -1,6 +1,14 @@
+import argparse
 import cv2
 from collections import deque
 from models.yolo_model import YOLODetector
+from camera_manager import parse_source
+from frame_skip import AdaptiveFrameSkip
+from inference_backend import yolo_model_path
+from tracker import MultiObjectTracker
+from motion_detect import shift_bbox
+from zones import compile_rules
+from preview import Preview, HEADLESS, PREVIEW_PORT
 
 # IEEE paper inspired change:
 # Use fixed-length frame sequences instead of single-frame processing
@@ -10,9 +18,56 @@ FRAME_SEQUENCE_LENGTH = 16   # can say "inspired by paper's 20-frame sequence"
 # Store recent predictions for temporal smoothing
 PREDICTION_WINDOW = 5
 
-def run_video_detection():
-    detector = YOLODetector()
-    cap = cv2.VideoCapture(0)
+# Frames added to the sequence are strided by an adaptive controller
+# instead of taking every captured frame
+INITIAL_FRAME_STRIDE = 1
+
+class SequenceAnalyzer:
+    """
+    Sequence-level decision shared by the live loop and batch_analyze:
+    per-frame detections go through the tracker and the zone rules,
+    and the suspicious flag is smoothed by majority vote over the last
+    PREDICTION_WINDOW sequences.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.tracker = MultiObjectTracker(labels=rules.labels)
+
+        # IEEE paper inspired change:
+        # Store recent predictions for temporal smoothing
+        self.prediction_history = deque(maxlen=PREDICTION_WINDOW)
+
+    def update(self, per_frame, roi_offset=(0, 0), now=None):
+        """
+        Returns (violations, final_decision) for one frame sequence.
+        """
+
+        # Tracks carry identities across the sequence, so two people
+        # count as two instead of one averaged "person" entry
+        for detections in per_frame:
+            for d in detections:
+                d["bbox"] = shift_bbox(d["bbox"], roi_offset)
+            ended = [e["track_id"] for e in self.tracker.update(detections) if e["event"] == "end"]
+            self.rules.forget(ended)
+
+        # Zone rules over the distinct objects tracked in the sequence
+        tracks = [t.to_dict() for t in self.tracker.confirmed_tracks()]
+        violations = self.rules.evaluate(tracks, now)
+
+        # Store prediction for temporal smoothing
+        is_suspicious = any(v["suspicious"] for v in violations)
+        self.prediction_history.append(is_suspicious)
+
+        # Temporal aggregation (majority voting)
+        suspicious_votes = sum(self.prediction_history)
+        final_decision = suspicious_votes >= (len(self.prediction_history) // 2 + 1)
+
+        return violations, final_decision
+
+def run_video_detection(source=0, headless=HEADLESS, preview_port=PREVIEW_PORT):
+    detector = YOLODetector(yolo_model_path())
+    cap = cv2.VideoCapture(parse_source(source))
 
     if not cap.isOpened():
         print("Could not open webcam")
@@ -20,8 +75,11 @@ def run_video_detection():
 
     print("Real-time Detection Running. Press 'q' to quit.")
 
+    preview = Preview("Real-Time Detection", headless=headless, port=preview_port)
     frame_buffer = []
-    prediction_history = deque(maxlen=PREDICTION_WINDOW)
+    frame_stride = AdaptiveFrameSkip(initial_skip=INITIAL_FRAME_STRIDE)
+    rules = None
+    analyzer = None
 
     while True:
         ret, frame = cap.read()
@@ -29,22 +87,40 @@ def run_video_detection():
             print("Frame read error")
             break
 
-        frame_buffer.append(frame)
+        if rules is None:
+            rules = compile_rules(source, frame.shape)
+            analyzer = SequenceAnalyzer(rules)
+
+        # Only the zones' bounding rect goes through the detector
+        if frame_stride.tick():
+            roi, roi_offset = rules.crop(frame)
+            frame_buffer.append(roi)
 
         # Run detection only when sequence buffer is full
         if len(frame_buffer) == FRAME_SEQUENCE_LENGTH:
-            annotated_frame, detections = detector.detect(frame_buffer)
+            # The last frame is only plotted when someone is watching
+            show = preview.wants_frame()
+            annotated_frame, per_frame = detector.detect_frames(frame_buffer, annotate=show)
+            _, final_decision = analyzer.update(per_frame, roi_offset)
 
-            # Count people across the frame sequence
-            people_count = sum(1 for d in detections if d["label"] == "person")
+            # Controller works with per-frame cost
+            frame_stride.update(
+                detector.last_latency_ms / len(frame_buffer),
+                labels=[d["label"] for detections in per_frame for d in detections]
+            )
 
-            # Store prediction for temporal smoothing
-            is_suspicious = people_count >= 2
-            prediction_history.append(is_suspicious)
+            # Clear buffer after processing sequence
+            frame_buffer.clear()
 
-            # Temporal aggregation (majority voting)
-            suspicious_votes = sum(prediction_history)
-            final_decision = suspicious_votes >= (len(prediction_history) // 2 + 1)
+            if not show:
+                continue
+
+            cv2.putText(
+                annotated_frame,
+                f"Sequence latency: {detector.last_latency_ms:.0f} ms",
+                (20, annotated_frame.shape[0] - 20),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2
+            )
 
             if final_decision:
                 cv2.putText(
@@ -54,16 +130,17 @@ def run_video_detection():
                     cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2
                 )
 
-            cv2.imshow("Real-Time Detection", annotated_frame)
-
-            # Clear buffer after processing sequence
-            frame_buffer.clear()
-
-        if cv2.waitKey(1) & 0xFF == ord("q"):
-            break
+            if not preview.show(annotated_frame):
+                break
 
     cap.release()
-    cv2.destroyAllWindows()
+    preview.close()
 
 if __name__ == "__main__":
-    run_video_detection()
+    parser = argparse.ArgumentParser(description="Sequence-based real-time detection")
+    parser.add_argument("source", nargs="?", default=0, help="camera index, RTSP URL or video file")
+    parser.add_argument("--headless", action="store_true", default=HEADLESS, help="no window, no drawing")
+    parser.add_argument("--preview-port", type=int, default=PREVIEW_PORT, help="serve an MJPEG preview on this port")
+    args = parser.parse_args()
+
+    run_video_detection(args.source, args.headless, args.preview_port)
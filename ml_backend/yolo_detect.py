@@ -1,16 +1,20 @@
 from ultralytics import YOLO
+import argparse
 import cv2
+from camera_manager import parse_source
+from preview import Preview, HEADLESS, PREVIEW_PORT
 
-def main():
+def main(source=0, headless=HEADLESS, preview_port=PREVIEW_PORT):
     model = YOLO("yolov8n.pt")  
 
-    cap = cv2.VideoCapture(0)
+    cap = cv2.VideoCapture(parse_source(source))
 
     if not cap.isOpened():
         print("Could not open webcam")
         return
 
     print("YOLO Detection Started. Press 'q' to quit.")
+    preview = Preview("YOLOv8 Detection", headless=headless, port=preview_port)
 
     while True:
         ret, frame = cap.read()
@@ -22,8 +26,6 @@ def main():
 
         result = results[0]
 
-        annotated_frame = result.plot() 
-
         person_detected = False
         for box in result.boxes:
             cls_id = int(box.cls[0])
@@ -31,6 +33,12 @@ def main():
             if class_name == "person":
                 person_detected = True
 
+        # Plotting is skipped unless someone is watching
+        if not preview.wants_frame():
+            continue
+
+        annotated_frame = result.plot()
+
         if person_detected:
             cv2.putText(
                 annotated_frame,
@@ -42,14 +50,18 @@ def main():
                 2,
             )
 
-        cv2.imshow("YOLOv8 Detection", annotated_frame)
-
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        if not preview.show(annotated_frame):
             break
 
     cap.release()
-    cv2.destroyAllWindows()
+    preview.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="YOLO detection on one camera")
+    parser.add_argument("source", nargs="?", default=0, help="camera index, RTSP URL or video file")
+    parser.add_argument("--headless", action="store_true", default=HEADLESS, help="no window, no drawing")
+    parser.add_argument("--preview-port", type=int, default=PREVIEW_PORT, help="serve an MJPEG preview on this port")
+    args = parser.parse_args()
+
+    main(args.source, args.headless, args.preview_port)
@@ -0,0 +1,325 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Per-camera rules file; the built-in defaults are used when it is missing
+ZONES_CONFIG = os.getenv("ZONES_CONFIG", os.path.join(os.path.dirname(__file__), "zones.json"))
+
+# Zone masks store one bit per zone, so a camera can have up to 32 zones
+MAX_ZONES = 32
+
+# Updates a track may fail a (zone, rule) before its alert re-arms and
+# its dwell timer restarts; absorbs detection flicker at zone edges
+EXIT_GRACE_UPDATES = 2
+
+# The whole frame, in normalized coordinates
+FULL_FRAME = [[0, 0], [1, 0], [1, 1], [0, 1]]
+
+# Mirrors the previously hardcoded behaviour: alert on people and
+# weapons anywhere, and flag two or more people as suspicious.
+# "suspicious" rules drive video_processing's sequence decision.
+DEFAULT_CONFIG = {
+    "cameras": {
+        "default": {
+            "zones": [
+                {
+                    "name": "frame",
+                    "polygon": FULL_FRAME,
+                    "rules": [
+                        {"name": "presence", "labels": ["person", "knife", "scissors", "gun"]},
+                        {"name": "crowd", "labels": ["person"], "min_count": 2, "suspicious": True}
+                    ]
+                }
+            ]
+        }
+    },
+    "sms": {
+        "min_confidence": 0.85,
+        "video_labels": ["knife", "gun", "scissors"]
+    }
+}
+
+
+def load_config(path: Optional[str] = ZONES_CONFIG) -> dict:
+    """
+    Rules file layout:
+
+        {
+          "cameras": {
+            "<source>" | "default": {
+              "zones": [
+                {
+                  "name": "door",
+                  "polygon": [[x, y], ...],    # normalized 0..1 frame coordinates
+                  "rules": [
+                    {"name": "weapon", "labels": ["knife", "gun"], "min_confidence": 0.5},
+                    {"name": "crowd", "labels": ["person"], "min_count": 3, "suspicious": true},
+                    {"name": "loitering", "labels": ["person"], "dwell_seconds": 30}
+                  ]
+                }
+              ]
+            }
+          },
+          "sms": {"min_confidence": 0.85, "video_labels": ["knife", "gun"]}
+        }
+    """
+
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return DEFAULT_CONFIG
+
+
+def camera_config(source, config: Optional[dict] = None) -> dict:
+    cameras = (config or load_config()).get("cameras", {})
+    return cameras.get(str(source), cameras.get("default", DEFAULT_CONFIG["cameras"]["default"]))
+
+
+class Rule:
+    def __init__(self, name, labels, min_confidence=0.0, min_count=1, dwell_seconds=0.0,
+                 suspicious=False):
+        self.name = name
+        self.labels = set(labels)
+        self.min_confidence = float(min_confidence)
+        self.min_count = int(min_count)
+        self.dwell_seconds = float(dwell_seconds)
+        self.suspicious = bool(suspicious)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Rule":
+        return cls(
+            d.get("name", "rule"), d["labels"], d.get("min_confidence", 0.0),
+            d.get("min_count", 1), d.get("dwell_seconds", 0.0), d.get("suspicious", False)
+        )
+
+    def accepts(self, track: dict) -> bool:
+        return track["label"] in self.labels and track["confidence"] >= self.min_confidence
+
+
+class Zone:
+    def __init__(self, index, name, polygon, rules):
+        self.index = index
+        self.bit = 1 << index
+        self.name = name
+        self.polygon = polygon
+        self.rules = rules
+
+
+class ZoneRules:
+    """
+    Compiled zone rules for one camera at one frame size.
+
+    Zone polygons are rasterized once into a uint32 mask with one bit
+    per zone, so finding the zones containing a box is a single array
+    lookup at its bottom-centre point (where a person stands) instead
+    of a point-in-polygon test per zone.
+
+    evaluate() takes tracked objects (dicts with track_id, label,
+    confidence, bbox) and returns the rule violations that currently
+    hold; each carries "new": True only on the update where it starts,
+    so callers can alert on edges.
+
+    Per-track state (whether a violation was already reported, when a
+    dwell timer started) is dropped once the track has failed the
+    (zone, rule) for more than exit_grace updates, e.g. it left the
+    zone, so re-entering alerts again and restarts the dwell timer
+    while a one-frame miss does neither. forget() drops the state of
+    tracks that ended.
+    """
+
+    def __init__(self, config: dict, frame_shape, exit_grace: int = EXIT_GRACE_UPDATES):
+        # cv2 is only needed to compile masks; api_backend reads
+        # sms_rules() from this module without it
+        import cv2
+
+        h, w = frame_shape[:2]
+        self.shape = (h, w)
+
+        zones_cfg = config.get("zones", [])[:MAX_ZONES]
+        self.zones: List[Zone] = []
+        self.mask = np.zeros((h, w), dtype=np.uint32)
+
+        scale = np.array([w - 1, h - 1], dtype=np.float64)
+        for i, z in enumerate(zones_cfg):
+            polygon = np.round(np.asarray(z["polygon"], dtype=np.float64) * scale).astype(np.int32)
+            zone = Zone(i, z.get("name", f"zone{i}"), polygon, [Rule.from_dict(r) for r in z.get("rules", [])])
+            self.zones.append(zone)
+
+            layer = np.zeros((h, w), dtype=np.uint8)
+            cv2.fillPoly(layer, [polygon], 1)
+            self.mask[layer.astype(bool)] |= zone.bit
+
+        # Bitmask value -> zones, filled on first lookup
+        self._zones_for_bits: Dict[int, List[Zone]] = {0: []}
+
+        self.labels = set().union(*(r.labels for z in self.zones for r in z.rules))
+        self.roi = self._bounding_rect()
+
+        # First time each (track, zone, rule) was seen, for dwell rules
+        self._entered: Dict[tuple, float] = {}
+        self._active = set()
+
+        # Consecutive updates each (track, zone, rule) was not satisfied
+        self.exit_grace = exit_grace
+        self._missed: Dict[tuple, int] = {}
+
+    def _bounding_rect(self):
+        """
+        Smallest rect covering every zone with rules, as x1, y1, x2, y2.
+        """
+
+        active = np.zeros(self.shape, dtype=bool)
+        for zone in self.zones:
+            if zone.rules:
+                active |= (self.mask & zone.bit) != 0
+
+        ys, xs = np.nonzero(active)
+        if len(xs) == 0:
+            return 0, 0, self.shape[1], self.shape[0]
+        return int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1
+
+    @property
+    def full_frame(self) -> bool:
+        return self.roi == (0, 0, self.shape[1], self.shape[0])
+
+    def crop(self, frame):
+        """
+        Restrict inference to the zones: returns (crop, (x, y) offset).
+        """
+
+        x1, y1, x2, y2 = self.roi
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def zones_at(self, bbox) -> List[Zone]:
+        x1, y1, x2, y2 = bbox
+        h, w = self.shape
+        x = min(max((x1 + x2) // 2, 0), w - 1)
+        y = min(max(y2, 0), h - 1)
+
+        bits = int(self.mask[y, x])
+        zones = self._zones_for_bits.get(bits)
+        if zones is None:
+            zones = [z for z in self.zones if bits & z.bit]
+            self._zones_for_bits[bits] = zones
+        return zones
+
+    def evaluate(self, tracks: List[dict], now: Optional[float] = None) -> List[dict]:
+        now = time.time() if now is None else now
+
+        matches = {}
+        for track in tracks:
+            for zone in self.zones_at(track["bbox"]):
+                for rule in zone.rules:
+                    if rule.accepts(track):
+                        matches.setdefault((zone, rule), []).append(track)
+
+        self._expire({
+            (track["track_id"], zone.name, rule.name)
+            for (zone, rule), matched in matches.items()
+            for track in matched
+        })
+
+        violations = []
+        count_keys = set()
+
+        for (zone, rule), matched in matches.items():
+            if rule.dwell_seconds > 0:
+                dwelling = []
+                for track in matched:
+                    key = (track["track_id"], zone.name, rule.name)
+                    entered = self._entered.setdefault(key, now)
+                    if now - entered >= rule.dwell_seconds:
+                        dwelling.append(track)
+                matched = dwelling
+
+            if len(matched) < rule.min_count:
+                continue
+
+            # Count rules fire once per zone, the others once per track
+            if rule.min_count > 1:
+                groups = [(None, matched)]
+            else:
+                groups = [(t["track_id"], [t]) for t in matched]
+
+            for track_id, group in groups:
+                key = (zone.name, rule.name, track_id)
+                new = key not in self._active
+                if track_id is None:
+                    count_keys.add(key)
+                else:
+                    self._active.add(key)
+
+                best = max(group, key=lambda t: t["confidence"])
+                violations.append({
+                    "zone": zone.name,
+                    "rule": rule.name,
+                    "label": best["label"],
+                    "confidence": best["confidence"],
+                    "track_id": track_id,
+                    "count": len(group),
+                    "suspicious": rule.suspicious,
+                    "new": new
+                })
+
+        # Count rules have no track to end with; they re-arm as soon as
+        # the count drops below min_count
+        self._active = {k for k in self._active if k[2] is not None} | count_keys
+
+        return violations
+
+    def _expire(self, present):
+        """
+        present holds the (track, zone, rule) keys satisfied in this
+        update; state of the others is dropped after exit_grace misses.
+        """
+
+        tracked = set(self._entered)
+        tracked.update((k[2], k[0], k[1]) for k in self._active if k[2] is not None)
+
+        expired = set()
+        for key in tracked:
+            if key in present:
+                self._missed.pop(key, None)
+                continue
+            self._missed[key] = self._missed.get(key, 0) + 1
+            if self._missed[key] > self.exit_grace:
+                expired.add(key)
+
+        for key in expired:
+            self._missed.pop(key, None)
+            self._entered.pop(key, None)
+            self._active.discard((key[1], key[2], key[0]))
+
+    def forget(self, track_ids):
+        """
+        Drop the state of tracks that ended.
+        """
+
+        ended = set(track_ids)
+        if not ended:
+            return
+        self._active = {k for k in self._active if k[2] not in ended}
+        self._entered = {k: t for k, t in self._entered.items() if k[0] not in ended}
+        self._missed = {k: n for k, n in self._missed.items() if k[0] not in ended}
+
+    def draw(self, frame, color=(255, 200, 0)):
+        import cv2
+
+        for zone in self.zones:
+            cv2.polylines(frame, [zone.polygon], True, color, 1)
+            x, y = zone.polygon[0]
+            cv2.putText(frame, zone.name, (int(x) + 4, int(y) + 14), cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1)
+        return frame
+
+
+def compile_rules(source, frame_shape, config: Optional[dict] = None) -> ZoneRules:
+    return ZoneRules(camera_config(source, config), frame_shape)
+
+
+def sms_rules(config: Optional[dict] = None) -> dict:
+    sms = dict(DEFAULT_CONFIG["sms"])
+    sms.update((config or load_config()).get("sms", {}))
+    return sms
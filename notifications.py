@@ -1,5 +1,8 @@
-from twilio.rest import Client
+import asyncio
 import os
+import threading
+import time
+from typing import List, Tuple
 
 # Load Twilio credentials from environment variables
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
@@ -7,19 +10,158 @@ TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_FROM_NUMBER = os.getenv("TWILIO_FROM_NUMBER")
 ALERT_TO_NUMBER = os.getenv("ALERT_TO_NUMBER")
 
-# Create Twilio client only if creds exist
-if not all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_FROM_NUMBER, ALERT_TO_NUMBER]):
-    raise RuntimeError("Twilio environment variables are not set correctly")
+# "twilio" sends real messages, "stub" only records them. Without
+# credentials the Twilio notifier falls back to the stub.
+NOTIFY_PROVIDER = os.getenv("NOTIFY_PROVIDER", "twilio")
 
-client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
 
+class Notifier:
+    """
+    Base class for message providers.
 
-def send_sms_alert(event_type: str, label: str, confidence: float):
+    Subclasses implement _send(); send() adds latency and failure
+    counters and never raises, so callers on worker threads or the
+    event loop only see a True/False result.
     """
-    Sends an SMS alert for a critical event.
+
+    name = "base"
+    configured = True
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self.last_error = None
+
+    def _send(self, to: str, body: str, channel: str):
+        raise NotImplementedError
+
+    def send(self, to: str, body: str, channel: str = "sms") -> bool:
+        start = time.perf_counter()
+        try:
+            self._send(to, body, channel)
+            ok = True
+        except Exception as e:
+            print(f"{channel.upper()} to {to} failed:", e)
+            self.last_error = str(e)
+            ok = False
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+            self.total_latency_ms += latency_ms
+            self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+
+        return ok
+
+    async def send_async(self, to: str, body: str, channel: str = "sms") -> bool:
+        # Provider SDKs are blocking; run them off the event loop
+        return await asyncio.to_thread(self.send, to, body, channel)
+
+    def stats(self) -> dict:
+        attempts = self.sent + self.failed
+        return {
+            "provider": self.name,
+            "configured": self.configured,
+            "sent": self.sent,
+            "failed": self.failed,
+            "avg_latency_ms": round(self.total_latency_ms / attempts, 1) if attempts else None,
+            "max_latency_ms": round(self.max_latency_ms, 1),
+            "last_error": self.last_error
+        }
+
+
+class TwilioNotifier(Notifier):
     """
+    Twilio SMS/WhatsApp. The SDK is imported and the client created on
+    the first send, then shared by all threads.
+    """
+
+    name = "twilio"
+
+    def __init__(self, account_sid, auth_token, sms_from, whatsapp_from=""):
+        super().__init__()
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.sms_from = sms_from
+        self.whatsapp_from = whatsapp_from
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.account_sid and self.auth_token and self.sms_from)
+
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from twilio.rest import Client
+                    self._client = Client(self.account_sid, self.auth_token)
+        return self._client
+
+    def _send(self, to: str, body: str, channel: str):
+        if channel == "whatsapp":
+            wa_to = to if to.startswith("whatsapp:") else f"whatsapp:{to}"
+            self.client().messages.create(body=body, from_=self.whatsapp_from, to=wa_to)
+        else:
+            self.client().messages.create(body=body, from_=self.sms_from, to=to)
+
+
+class StubNotifier(Notifier):
+    """
+    Records messages instead of sending them, for local runs and tests.
+    """
+
+    name = "stub"
 
-    message = (
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.messages: List[Tuple[str, str, str]] = []
+
+    def _send(self, to: str, body: str, channel: str):
+        if self.delay:
+            time.sleep(self.delay)
+        with self._stats_lock:
+            self.messages.append((to, body, channel))
+        print(f"[stub {channel}] to {to}: {body!r}")
+
+
+def create_notifier(provider=NOTIFY_PROVIDER, account_sid=TWILIO_ACCOUNT_SID,
+                    auth_token=TWILIO_AUTH_TOKEN, sms_from=TWILIO_FROM_NUMBER,
+                    whatsapp_from="") -> Notifier:
+    if provider == "twilio":
+        notifier = TwilioNotifier(account_sid, auth_token, sms_from, whatsapp_from)
+        if notifier.configured:
+            return notifier
+        print("Twilio environment variables are not set; using the stub notifier.")
+    return StubNotifier()
+
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier() -> Notifier:
+    """
+    Process-wide notifier for ALERT_TO_NUMBER, created on first use.
+    """
+
+    global _notifier
+    with _notifier_lock:
+        if _notifier is None:
+            _notifier = create_notifier()
+        return _notifier
+
+
+def format_alert(event_type: str, label: str, confidence: float) -> str:
+    return (
         f"SUSPICIOUS ACTIVITY DETECTED \n\n"
         f"Type: {event_type.upper()}\n"
         f"Label: {label.upper()}\n"
@@ -27,13 +169,26 @@ def send_sms_alert(event_type: str, label: str, confidence: float):
         f"Action recommended."
     )
 
-    try:
-        client.messages.create(
-            body=message,
-            from_=TWILIO_FROM_NUMBER,
-            to=ALERT_TO_NUMBER
-        )
+
+def send_sms_alert(event_type: str, label: str, confidence: float) -> bool:
+    """
+    Sends an SMS alert for a critical event.
+    """
+
+    if not ALERT_TO_NUMBER:
+        print("ALERT_TO_NUMBER is not set. Skipping SMS.")
+        return False
+
+    ok = get_notifier().send(ALERT_TO_NUMBER, format_alert(event_type, label, confidence))
+    if ok:
         print("SMS sent successfully")
+    return ok
+
+
+async def send_sms_alert_async(event_type: str, label: str, confidence: float) -> bool:
+    """
+    send_sms_alert() for async handlers; the blocking send runs on a
+    worker thread so the event loop keeps serving requests.
+    """
 
-    except Exception as e:
-        print(" SMS failed:", e)
+    return await asyncio.to_thread(send_sms_alert, event_type, label, confidence)